@@ -0,0 +1,110 @@
+"""
+Compare the bitboard Board against the old numpy string-matching win check.
+
+Run from the repo root:
+    PYTHONPATH=connect4_engine python benchmarks/bench_board.py
+"""
+import logging
+import random
+import time
+
+import numpy as np
+
+from core.board import Board
+from utils.logger import logger
+
+
+def legacy_is_player_winner(grid: np.ndarray, player: int) -> bool:
+    """
+    The win check Board used before the bitboards: np.array_str on every line + substring search.
+    """
+    check = " ".join([str(player)] * 4)
+    height, width = grid.shape
+    if any(check in np.array_str(grid[:, col]) for col in range(width)):
+        return True
+    if any(check in np.array_str(grid[row, :]) for row in range(height)):
+        return True
+    for g in (grid, np.fliplr(grid)):
+        for k in range(-height + 4, width - 3):
+            if check in np.array_str(g.diagonal(k)):
+                return True
+    return False
+
+
+def legacy_available_actions(grid: np.ndarray):
+    return [col for col in range(grid.shape[1]) if grid[-1][col] == Board.P_EMPTY]
+
+
+def random_boards(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(n):
+        board = Board()
+        player = Board.P_RED
+        for _ in range(rng.randint(0, 30)):
+            board.drop_piece(rng.choice(board.available_actions()), player)
+            if board.is_player_winner(player):
+                break
+            player = Board.P_RED + Board.P_YELLOW - player
+        boards.append(board)
+    return boards
+
+
+def timeit(fn, items, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items)
+
+
+def time_playouts(width: int, height: int, games: int = 300, seed: int = 0) -> float:
+    """
+    Average time of one play() + undo() in random games, win check included
+    """
+    rng = random.Random(seed)
+    board = Board(width, height)
+    total, count = 0.0, 0
+    for _ in range(games):
+        start = time.perf_counter()
+        while not board.done:
+            board.play(rng.choice(board.available_actions()))
+        played = board.moves
+        while board.moves:
+            board.undo()
+        total += time.perf_counter() - start
+        count += played
+    return total / count
+
+
+def main():
+    logger.setLevel(logging.WARNING)  # drop_piece logs the whole board
+    boards = random_boards(2000)
+    grids = [np.array(b._grid) for b in boards]
+
+    for b, g in zip(boards, grids):
+        for player in (Board.P_RED, Board.P_YELLOW):
+            assert b.is_player_winner(player) == legacy_is_player_winner(g, player)
+
+    rows = [
+        ("is_player_winner",
+         timeit(lambda g: legacy_is_player_winner(g, Board.P_RED), grids),
+         timeit(lambda b: b.is_player_winner(Board.P_RED), boards)),
+        ("available_actions",
+         timeit(legacy_available_actions, grids),
+         timeit(lambda b: b.available_actions(), boards)),
+    ]
+    print(f"{'op':<20}{'legacy us':>12}{'bitboard us':>14}{'speedup':>10}")
+    for name, old, new in rows:
+        print(f"{name:<20}{old * 1e6:>12.2f}{new * 1e6:>14.2f}{old / new:>9.1f}x")
+
+    print()
+    print(f"{'board':<10}{'play+undo us':>14}")
+    for width, height in ((7, 6), (8, 7), (9, 7)):
+        print(f"{f'{width}x{height}':<10}{time_playouts(width, height) * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Node rate of the pure Python negamax AI.
+
+Run from the repo root:
+    PYTHONPATH=connect4_engine python benchmarks/bench_negamax.py [--budget SECONDS]
+"""
+import argparse
+import logging
+import time
+
+from core.ai import AINegamax
+from core.board import Board
+from utils.logger import logger
+
+# opening, middle game and end game positions (1-based c4solver move strings)
+POSITIONS = [
+    "",
+    "4444",
+    "4455",
+    "44433322",
+    "726121347245152162",
+    "475774457522754657214321516462",
+]
+
+
+def board_from(moves: str) -> Board:
+    board = Board()
+    for move in moves:
+        board.play(int(move) - 1)
+    return board
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds of search per position")
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+
+    print(f"{'position':<32}{'move':>6}{'depth':>7}{'score':>7}{'nodes':>10}{'knodes/s':>10}")
+    total_nodes, total_time = 0, 0.0
+    for moves in POSITIONS:
+        ai = AINegamax(time_budget=args.budget)
+        start = time.perf_counter()
+        col = ai.choose_move(board_from(moves))
+        elapsed = time.perf_counter() - start
+        total_nodes += ai.nodes
+        total_time += elapsed
+        print(f"{moves or '(empty)':<32}{col:>6}{ai.last_depth:>7}{ai.last_score:>7}"
+              f"{ai.nodes:>10}{ai.nodes / elapsed / 1e3:>10.1f}")
+    print(f"{'total':<52}{total_nodes:>10}{total_nodes / total_time / 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
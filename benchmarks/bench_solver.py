@@ -0,0 +1,265 @@
+"""
+Latency of every available solver engine over standard position sets.
+
+Engines: one c4solver subprocess, a SolverPool queried from several threads, the
+in-process library, and the negamax fallback. Position sets are Pascal Pons' test
+files ("moves score" lines, e.g. Test_L3_R1 = end-easy, Test_L2_R2 = middle-medium,
+Test_L1_R3 = begin-hard from http://blog.gamesolver.org/solving-connect-four/02-test-protocol/)
+given with --set name=path, and random game prefixes given with --prefix MOVES.
+
+Results (p50/p95/p99 latency, nodes, positions/s, wrong scores) are printed and
+written as JSON to compare runs across commits and machines.
+
+Run from the repo root:
+    PYTHONPATH=connect4_engine python benchmarks/bench_solver.py --set end-easy=Test_L3_R1 --out bench_solver.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from core.ai import AINegamax
+from core.board import Board
+from core.solver_binding import DEFAULT_LIBRARY, SolverBinding
+from core.solver_pool import (DEFAULT_BOOK, SolverError, SolverPool, SolverProcess, default_solver_path,
+                              solver_command)
+from tools.build_tablebase import sample_games
+from utils.logger import logger
+
+# (moves, expected score or None)
+Position = Tuple[str, Optional[int]]
+# (seconds, nodes or None, score or None, seconds spent searching as the solver reports it),
+# None seconds for a failed query
+Sample = Tuple[Optional[float], Optional[int], Optional[int], Optional[float]]
+
+
+def load_test_set(path: str) -> List[Position]:
+    """
+    Pascal Pons' test set format: one "moves score" line per position
+    """
+    positions = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                moves, score = line.split()
+                positions.append((moves, int(score)))
+    return positions
+
+
+def random_prefixes(moves: int, count: int, seed: int = 0) -> List[Position]:
+    """
+    count positions of the given number of moves, cut from sampled games still going on there
+    """
+    positions = []
+    games = iter(sample_games(100 * count, seed))
+    for game in games:
+        if len(game) > moves:
+            positions.append((game[:moves], None))
+            if len(positions) == count:
+                break
+    return positions
+
+
+def parse_solve(out: str) -> Tuple[int, Optional[int], Optional[float]]:
+    """
+    (score, nodes, search seconds) from a c4solver -t answer,
+    solvers built before -t only print the score
+    """
+    fields = out.split()
+    if not fields:
+        raise SolverError("Solver rejected the position")
+    if len(fields) < 3:
+        return int(fields[0]), None, None
+    return int(fields[0]), int(fields[1]), int(fields[2]) * 1e-6
+
+
+# --- engines: each returns one Sample per position and the wall time ------------------
+# the solvers are started and warmed up (book loaded) before the clock starts
+
+WARMUP = "121212"  # immediate win, answered at once
+
+
+def run_subprocess(positions: List[Position], args) -> Tuple[List[Sample], float]:
+    process = SolverProcess(solver_command(args.solver, args.book, analyze=False, timing=True))
+    try:
+        def solve(moves):
+            try:
+                out = process.query(moves, args.timeout)
+            except SolverError:
+                # a late answer would be read as the next position's: start over, like SolverPool does
+                process.restart()
+                process.query(WARMUP, args.timeout)
+                raise
+            return parse_solve(out)
+
+        process.query(WARMUP, args.timeout)
+        start = time.perf_counter()
+        samples = [_timed(lambda moves=moves: solve(moves)) for moves, _ in positions]
+        return samples, time.perf_counter() - start
+    finally:
+        process.close()
+
+
+def run_pool(positions: List[Position], args) -> Tuple[List[Sample], float]:
+    pool = SolverPool(args.solver, args.book, size=args.workers, timeout=args.timeout, analyze=False, timing=True)
+    try:
+        for _ in range(args.workers):  # idle workers rotate, each gets one
+            pool.query(WARMUP)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.workers) as executor:
+            samples = list(executor.map(lambda p: _timed(lambda: parse_solve(pool.query(p[0]))), positions))
+        return samples, time.perf_counter() - start
+    finally:
+        pool.close()
+
+
+def run_binding(positions: List[Position], args) -> Tuple[List[Sample], float]:
+    binding = SolverBinding(args.library, args.book)
+    try:
+        def solve(moves):
+            score = binding.solve(moves)
+            return score, binding.last_nodes, None  # in process, the call is the search
+
+        start = time.perf_counter()
+        samples = [_timed(lambda moves=moves: solve(moves)) for moves, _ in positions]
+        return samples, time.perf_counter() - start
+    finally:
+        binding.close()
+
+
+def run_negamax(positions: List[Position], args) -> Tuple[List[Sample], float]:
+    ai = AINegamax(time_budget=args.negamax_budget)
+    boards = []
+    for moves, _ in positions:
+        board = Board()
+        for move in moves:
+            board.play(int(move) - 1)
+        boards.append(board)
+    samples = []
+    for board in boards:
+        start = time.perf_counter()
+        ai.choose_move(board)
+        elapsed = time.perf_counter() - start
+        samples.append((elapsed, ai.nodes, None, elapsed))  # a move, not a score
+    return samples, sum(sample[0] for sample in samples)
+
+
+def _timed(query) -> Sample:
+    start = time.perf_counter()
+    try:
+        score, nodes, search = query()
+    except SolverError as e:
+        logger.warning(f"Query failed: {e}")
+        return None, None, None, None
+    elapsed = time.perf_counter() - start
+    return elapsed, nodes, score, elapsed if search is None else search
+
+
+ENGINES = {
+    "subprocess": run_subprocess,
+    "pool": run_pool,
+    "binding": run_binding,
+    "negamax": run_negamax,
+}
+
+
+def available_engines(args) -> List[str]:
+    engines = []
+    if os.access(args.solver, os.X_OK):
+        engines += ["subprocess", "pool"]
+    if os.path.exists(args.library):
+        engines.append("binding")
+    return engines + ["negamax"]
+
+
+def summarize(engine: str, set_name: str, positions: List[Position], samples: List[Sample], wall: float) -> dict:
+    latencies = np.array([s[0] for s in samples if s[0] is not None])
+    nodes = [s[1] for s in samples if s[1] is not None]
+    search = sum(s[3] for s in samples if s[1] is not None)
+    wrong = sum(1 for (_, expected), (_, _, score, _) in zip(positions, samples)
+                if expected is not None and score is not None and score != expected)
+    result = {
+        "engine": engine,
+        "set": set_name,
+        "positions": len(positions),
+        "failed": len(samples) - len(latencies),
+        "wrong_scores": wrong,
+        "wall_seconds": wall,
+        "positions_per_second": len(latencies) / wall if wall > 0 else None,
+        "mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None,
+        "nodes": sum(nodes) if nodes else None,
+        "nodes_per_second": sum(nodes) / search if nodes and search > 0 else None,
+    }
+    if len(latencies):
+        result["mean_ms"] = float(latencies.mean() * 1e3)
+        for q in (50, 95, 99):
+            result[f"p{q}_ms"] = float(np.percentile(latencies, q) * 1e3)
+    return result
+
+
+def machine_info() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit or None,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=PATH", help="Pons test set file")
+    parser.add_argument("--prefix", type=int, action="append", default=[], metavar="MOVES",
+                        help="random game prefixes of this many moves (default 32 and 26 when no --set)")
+    parser.add_argument("--count", type=int, default=50, help="positions per random prefix set")
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES), help="default every available engine")
+    parser.add_argument("--solver", default=default_solver_path())
+    parser.add_argument("--library", default=DEFAULT_LIBRARY)
+    parser.add_argument("--book", default=DEFAULT_BOOK)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="pool size")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds per query before it counts as failed")
+    parser.add_argument("--negamax-budget", type=float, default=1.0)
+    parser.add_argument("--out", default="bench_solver.json")
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+
+    sets = [(name, load_test_set(path)) for name, path in (item.split("=", 1) for item in args.set)]
+    prefixes = args.prefix or ([] if sets else [32, 26])
+    sets += [(f"random-{moves}", random_prefixes(moves, args.count)) for moves in prefixes]
+
+    results = []
+    print(f"{'engine':<12}{'set':<16}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'pos/s':>10}{'Mnodes/s':>10}{'wrong':>7}")
+    for engine in args.engine or available_engines(args):
+        for set_name, positions in sets:
+            samples, wall = ENGINES[engine](positions, args)
+            result = summarize(engine, set_name, positions, samples, wall)
+            results.append(result)
+
+            def fmt(value, scale=1.0):
+                return "-" if value is None else f"{value * scale:.2f}"
+
+            print(f"{engine:<12}{set_name:<16}{len(positions):>5}{fmt(result['p50_ms']):>10}{fmt(result['p95_ms']):>10}"
+                  f"{fmt(result['p99_ms']):>10}{fmt(result['positions_per_second']):>10}"
+                  f"{fmt(result['nodes_per_second'], 1e-6):>10}{result['wrong_scores']:>7}")
+
+    with open(args.out, "w") as f:
+        json.dump({"machine": machine_info(), "results": results}, f, indent=2)
+    print(f"\nwritten to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Size / latency / hit rate of the late-game tablebase for several empty cell limits.
+
+The tablebase is built from sampled games and tried on other sampled games: the hit
+rate is the share of positions within reach of the table (at most empty + 1 cells left)
+whose every reply was in it.
+
+Run from the repo root:
+    PYTHONPATH=connect4_engine python benchmarks/bench_tablebase.py [--games 500] [--test-games 200]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from core.board import Board
+from core.tablebase import Tablebase, build_tablebase, save_tablebase
+from tools.build_tablebase import sample_games
+from utils.logger import logger
+
+
+def measure(max_empty: int, seed_games, test_games, directory: str):
+    start = time.perf_counter()
+    scores = build_tablebase(seed_games, max_empty)
+    build_time = time.perf_counter() - start
+    path = os.path.join(directory, f"{max_empty}.tablebase")
+    save_tablebase(path, scores, max_empty)
+    table = Tablebase(path)
+
+    lookups, lookup_time = 0, 0.0
+    for moves in test_games:
+        board = Board()
+        for move in moves:
+            if board.done:
+                break
+            start = time.perf_counter()
+            table.analyze(board)
+            lookup_time += time.perf_counter() - start
+            lookups += 1
+            board.play(int(move) - 1)
+    result = (max_empty, len(scores), os.path.getsize(path), build_time,
+              table.hit_rate(), table.hits + table.misses, lookup_time / lookups)
+    table.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=500, help="games the tablebase is built from")
+    parser.add_argument("--test-games", type=int, default=200, help="games it is tried on")
+    parser.add_argument("--empty", type=int, nargs="+", default=[8, 10, 12, 14])
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+
+    seed_games = sample_games(args.games, seed=1)
+    test_games = sample_games(args.test_games, seed=2)
+    print(f"{'empty':>6}{'positions':>11}{'size kB':>9}{'build s':>9}{'hit rate':>10}{'in reach':>10}{'analyze us':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for max_empty in args.empty:
+            empty, count, size, build_time, hit_rate, reach, latency = measure(max_empty, seed_games, test_games, directory)
+            print(f"{empty:>6}{count:>11}{size / 1e3:>9.1f}{build_time:>9.2f}{hit_rate:>10.1%}{reach:>10}{latency * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 from core.board import Board
+from core.move_cache import MoveCache
+from core.opening_book import OpeningBook, load_book
+from core.solver_binding import SolverBinding, load_binding
+from core.solver_pool import DEFAULT_TIMEOUT, SolverError, SolverPool, SolverTimeout, default_solver_path
+from core.tablebase import Tablebase, load_tablebase
 from utils.logger import logger
-import subprocess
-from time import sleep
+from utils.tracing import tracer
+from typing import Optional
+import threading
+from time import monotonic, sleep
 class AIPlayerDummy:
     def __init__(self):
         pass
@@ -19,44 +26,385 @@ class AIPlayerDummy:
             raise Exception("No available moves left.")
     
 class AIPascalPons:
-    def __init__(self, ai_executable_path: str):
-        self.ai_executable_path = ai_executable_path
-        self.proc = subprocess.Popen(
-            [self.ai_executable_path, "-a", "-b", "connect4_engine/core/7x6.book"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,      # work with str instead of bytes
-        )
+    # share of the time left before the deadline given to the strong solver, the weak
+    # solver gets the rest minus HEURISTIC_RESERVE seconds kept for the negamax fallback
+    STRONG_SHARE = 0.6
+    HEURISTIC_RESERVE = 0.25
 
-    def choose_move(self, board: Board):
+    def __init__(self,
+                 ai_executable_path: Optional[str] = None,
+                 pool: Optional[SolverPool] = None,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 cache: Optional[MoveCache] = None,
+                 binding: Optional[SolverBinding] = None,
+                 turn_budget: Optional[float] = None,
+                 opening_book: Optional[OpeningBook] = None,
+                 tablebase: Optional[Tablebase] = None,
+                 weak_pool: Optional[SolverPool] = None):
+        self.ai_executable_path = ai_executable_path or default_solver_path()
+        self.cache = cache
+        # book positions are answered from the mapped book file, without asking the solver
+        self.opening_book = opening_book or load_book()
+        # same for the late positions in the tablebase
+        self.tablebase = tablebase or load_tablebase()
+        # seconds per move when choose_move is not given a deadline, None for no limit
+        self.turn_budget = turn_budget
+        # the in-process solver when its library was built, otherwise the c4solver subprocess.
+        # several games can share one pool, otherwise the AI gets a single supervised solver
+        self.binding = binding
+        if binding is None and pool is None:
+            self.binding = load_binding()
+        self.pool = None
+        if self.binding is None:
+            self.pool = pool or SolverPool(self.ai_executable_path, size=1, timeout=timeout)
+        # weak solver and negamax for the deadline tiers, started on first use or right away with a turn budget.
+        # games sharing a pool can share a weak pool too
+        self._weak = weak_pool
+        self._heuristic = None
+        self.last_tier = None
+        self.last_scores = None
+        if turn_budget is not None:
+            self._weak_solver()
+        logger.debug(f"Pascal Pons AI using {'in-process solver' if self.binding else self.ai_executable_path}")
+
+    def choose_move(self, board: Board, deadline: Optional[float] = None):
         """
         Choose a move by invoking the external Pascal Pons AI executable.
+        with a deadline (time.monotonic() value) the strong solver is tried first, then
+        the weak solver (win / draw / loss only), then the negamax AI, so an answer is
+        always ready by the deadline. last_tier tells which one answered.
         """
+        start = monotonic()
+        col = self._choose_move(board, deadline)
+        tracer.record(f"ai.choose_move.{self.last_tier}", monotonic() - start)
+        return col
 
-
+    def _choose_move(self, board: Board, deadline: Optional[float]):
         logger.debug("AI (Pascal Pons) is choosing a move...")
+        self.last_scores = None
+        if self.cache is not None:
+            col = self.cache.get(board)
+            if col is not None:
+                logger.debug(f"Move cache hit for {board.pons_string}: {col}")
+                self.last_tier = "cache"
+                return col
+        for tier, table in (("book", self.opening_book), ("tablebase", self.tablebase)):
+            scores = table.analyze(board) if table is not None else None
+            if scores is not None:
+                self.last_tier, self.last_scores = tier, scores
+                return scores.index(max(scores))
+        if deadline is None and self.turn_budget is not None:
+            deadline = monotonic() + self.turn_budget
+        logger.debug(f"Sending board state to AI: {board.pons_string}")
+        if deadline is None:
+            col, self.last_tier = self._solve(board, weak=False), "strong"
+        else:
+            col, self.last_tier = self._choose_before(board, deadline)
+        logger.info(f"AI move {col} from the {self.last_tier} tier, scores {self.last_scores}")
+        # only perfect moves are worth keeping
+        if self.cache is not None and self.last_tier == "strong":
+            self.cache.put(board, col)
+        return col
+
+    def _choose_before(self, board: Board, deadline: float):
+        """
+        (column, tier) from the best tier that answers before the deadline
+        """
+        for weak, share in ((False, self.STRONG_SHARE), (True, 1.0)):
+            timeout = (deadline - monotonic() - self.HEURISTIC_RESERVE) * share
+            if timeout <= 0:
+                break
+            try:
+                return self._solve(board, weak, timeout), "weak" if weak else "strong"
+            except SolverTimeout:
+                logger.warning(f"{'Weak' if weak else 'Strong'} solver missed its {timeout:.2f}s budget")
+        if self._heuristic is None:
+            self._heuristic = AINegamax()
+        self._heuristic.time_budget = max(deadline - monotonic(), 0.0)
+        return self._heuristic.choose_move(board), "heuristic"
+
+    def _solve(self, board: Board, weak: bool, timeout: Optional[float] = None) -> int:
+        """
+        Best column from the strong or the weak solver, SolverTimeout after timeout seconds
+        """
+        solver = self._weak_solver() if weak else (self.binding or self.pool)
+        with tracer.span("ai.solve.weak" if weak else "ai.solve.strong"):
+            if not isinstance(solver, SolverBinding):
+                col, self.last_scores = solver.analyze(board, timeout)
+                return col
+            if timeout is None:
+                self.last_scores = solver.analyze(board.pons_string, weak)
+            else:
+                # a ctypes call can't be interrupted: leave it running and give up waiting,
+                # the solver's lock holds back the next query until it is done
+                self.last_scores = _run_with_timeout(solver.analyze, timeout, board.pons_string, weak)
+        return self.last_scores.index(max(self.last_scores))
+
+    def _weak_solver(self):
+        """
+        Second solver for the weak tier, so it is free while the strong one is still searching
+        """
+        if self._weak is None:
+            if self.binding is not None:
+                self._weak = SolverBinding(self.binding.library_path, self.binding.book)
+            else:
+                self._weak = SolverPool(self.pool.executable, self.pool.book, size=1, weak=True)
+        return self._weak
+
+    def interrupt(self):
+        """
+        Abort a choose_move running on another thread (the in-process solver can't be interrupted)
+        """
+        if self.pool is not None:
+            self.pool.interrupt()
+
+
+def _run_with_timeout(fn, timeout: float, *args):
+    """
+    fn(*args) on a daemon thread, SolverTimeout if it is not done after timeout seconds
+    """
+    result = []
+    errors = []
+
+    def run():
+        try:
+            result.append(fn(*args))
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise SolverTimeout(f"Solver did not answer within {timeout:.3f}s")
+    if errors:
+        raise errors[0]
+    return result[0]
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the negamax search when the time budget is spent
+    """
+
+
+class AINegamax:
+    """
+    Iterative deepening negamax with alpha-beta on the Board bitboards, for when c4solver
+    is not available. Not a perfect player: past the search depth positions are scored by
+    the number of open threats. Always answers within time_budget seconds, with the best
+    move of the deepest finished iteration.
+    """
+    WIN_SCORE = 10_000
+    EXACT, LOWER, UPPER = 0, 1, 2
+    CHECK_EVERY = 1024  # nodes between two looks at the clock
+
+    def __init__(self, time_budget: float = 2.0, max_depth: Optional[int] = None, table_size: int = 1_000_000):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.table_size = table_size
+        # key -> (depth, flag, value, best column)
+        self.table = {}
+        self.geometry = None
+        self.nodes = 0
+        self.last_depth = 0
+        self.last_score = 0
+        self._interrupted = False
+
+    def _setup(self, board: Board):
+        """
+        Precompute the masks of the board size, once per geometry
+        """
+        if self.geometry is board.geometry:
+            return
+        g = self.geometry = board.geometry
+        self.table.clear()
+        self._width, self._cells = g.width, g.width * g.height
+        self._bottom, self._full = g.bottom_mask, g.board_mask
+        self._columns = [g.column_bits << (col * g.stride) for col in range(g.width)]
+        # center columns first, they take part in more lines
+        self._order = sorted(range(g.width), key=lambda col: abs(2 * col - (g.width - 1)))
+        # an empty cell wins when it has k stones on one side and connect - 1 - k on the other,
+        # for each direction: (shifts towards one side, shifts towards the other side)
+        self._sides = [(tuple(i * d for i in range(1, g.connect)), tuple(i * d for i in range(1, g.connect)))
+                       for d in g.directions]
+
+    def _winning_cells(self, bits: int, mask: int) -> int:
+        """
+        Empty cells that complete a line of bits (Position::compute_winning_position for any connect)
+        """
+        cells = 0
+        n = self.geometry.connect - 1
+        for right, left in self._sides:
+            # runs[j]: cells followed by j stones in a row in this direction, same for the other side
+            runs_r, runs_l = [-1], [-1]
+            m_r = m_l = -1
+            for shift in right:
+                m_r &= bits >> shift
+                runs_r.append(m_r)
+            for shift in left:
+                m_l &= bits << shift
+                runs_l.append(m_l)
+            for k in range(n + 1):
+                cells |= runs_r[k] & runs_l[n - k]
+        return cells & (self._full ^ mask)
+
+    def choose_move(self, board: Board):
+        """
+        Search the position for at most time_budget seconds and return the best column found
+        """
+        logger.debug("AI (negamax) is choosing a move...")
+        available_columns = board.available_actions()
+        if not available_columns:
+            raise Exception("No available moves left.")
+        self._setup(board)
+        if len(self.table) > self.table_size:
+            self.table.clear()
+        position, mask = board.player_bits(board.to_move), board.mask
+        self._deadline = monotonic() + self.time_budget
+        self._interrupted = False
+        self.nodes = 0
+        self._next_check = self.CHECK_EVERY
+
+        best = available_columns[len(available_columns) // 2]
+        remaining = self._cells - board.moves
+        max_depth = min(remaining, self.max_depth or remaining)
+        for depth in range(1, max_depth + 1):
+            try:
+                score, col = self._search_root(position, mask, board.moves, depth)
+            except SearchTimeout:
+                break
+            best, self.last_depth, self.last_score = col, depth, score
+            if abs(score) > self.WIN_SCORE - self._cells:
+                break  # the game is solved, deeper iterations can't change the move
+        logger.debug(f"Negamax reached depth {self.last_depth} ({self.nodes} nodes), score {self.last_score}")
+        tracer.record("ai.negamax", monotonic() - self._deadline + self.time_budget)
+        return best
+
+    def interrupt(self):
+        """
+        Stop a search running on another thread, it returns its best move so far
+        """
+        self._interrupted = True
+
+    def _search_root(self, position: int, mask: int, moves: int, depth: int):
+        """
+        Root of one iteration, returns (score, column)
+        """
+        alpha, beta = -self.WIN_SCORE - 1, self.WIN_SCORE + 1
+        best_col = None
+        for col, move in self._ordered_moves(position, mask, (mask + self._bottom) & self._full):
+            if self._winning_cells(position, mask) & move:
+                return self.WIN_SCORE - moves - 1, col
+            score = -self._negamax(position ^ mask, mask | move, moves + 1, depth - 1, -beta, -alpha)
+            if best_col is None or score > alpha:
+                alpha, best_col = score, col
+        self.table[position + mask] = (depth, self.EXACT, alpha, best_col)
+        return alpha, best_col
+
+    def _ordered_moves(self, position: int, mask: int, possible: int):
+        """
+        (column, move bit) of the possible moves: the table's best move, then the moves
+        creating the most threats, center first among equals
+        """
+        entry = self.table.get(position + mask)
+        first = entry[3] if entry is not None else None
+        scored = []
+        for i, col in enumerate(self._order):
+            move = possible & self._columns[col]
+            if move:
+                if col == first:
+                    rank = 1 << 20
+                else:
+                    rank = bin(self._winning_cells(position | move, mask | move)).count("1") * self._width - i
+                scored.append((rank, col, move))
+        scored.sort(reverse=True)
+        return [(col, move) for _, col, move in scored]
+
+    def _negamax(self, position: int, mask: int, moves: int, depth: int, alpha: int, beta: int) -> int:
+        """
+        Score of the position for the player to move, position holds that player's stones.
+        the opponent's last move did not win the game.
+        """
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._next_check += self.CHECK_EVERY
+            if self._interrupted or monotonic() > self._deadline:
+                raise SearchTimeout()
+        if moves == self._cells:
+            return 0
+        possible = (mask + self._bottom) & self._full
+        own_wins = self._winning_cells(position, mask)
+        if own_wins & possible:
+            return self.WIN_SCORE - moves - 1
+        opponent_wins = self._winning_cells(position ^ mask, mask)
+        forced = possible & opponent_wins
+        if forced:
+            if forced & (forced - 1):
+                return -(self.WIN_SCORE - moves - 2)  # two threats, can't block both
+            possible = forced
+        possible &= ~(opponent_wins >> 1)  # don't play under an opponent's winning cell
+        if not possible:
+            return -(self.WIN_SCORE - moves - 2)
+        if depth <= 0:
+            return bin(own_wins).count("1") - bin(opponent_wins).count("1")
+
+        key = position + mask
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= depth:
+            _, flag, value, _ = entry
+            if flag == self.EXACT:
+                return value
+            if flag == self.LOWER and value >= beta:
+                return value
+            if flag == self.UPPER and value <= alpha:
+                return value
+
+        original_alpha = alpha
+        best, best_col = -self.WIN_SCORE - 1, None
+        for col, move in self._ordered_moves(position, mask, possible):
+            score = -self._negamax(position ^ mask, mask | move, moves + 1, depth - 1, -beta, -alpha)
+            if score > best:
+                best, best_col = score, col
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        flag = self.UPPER if best <= original_alpha else self.LOWER if best >= beta else self.EXACT
+        self.table[key] = (depth, flag, best, best_col)
+        return best
+
+
+def make_ai(time_budget: float = 2.0, **kwargs):
+    """
+    AIPascalPons when a solver can run here, AINegamax otherwise (no library and the
+    c4solver binary missing, built for another platform or too old to answer every query)
+    """
+    try:
+        return AIPascalPons(**kwargs)
+    except (OSError, SolverError) as e:
+        logger.warning(f"c4solver unavailable ({e}), falling back to the negamax AI")
+        return AINegamax(time_budget=time_budget)
+
+
+def make_ponder_ai(time_budget: float, fallback_budget: float = 2.0, cache: Optional[MoveCache] = None,
+                   executable: Optional[str] = None):
+    """
+    AI for the Ponderer: a c4solver subprocess even when the in-process library is built,
+    so interrupt() kills the search in flight, and no query runs longer than time_budget.
+    AINegamax when c4solver can't run here.
+    """
+    try:
+        pool = SolverPool(executable or default_solver_path(), size=1, timeout=time_budget)
+    except (OSError, SolverError) as e:
+        logger.warning(f"c4solver unavailable ({e}), pondering with the negamax AI")
+        return AINegamax(time_budget=fallback_budget)
+    return AIPascalPons(pool=pool, cache=cache)
+
 
-        # send a string
-        self.proc.stdin.write(board.pons_string + "\n")
-        self.proc.stdin.flush() # ensure it's sent
-        logger.debug(f"Sent board state to AI: {board.pons_string}")
-        out = self.proc.stdout.readline()
-        return int(out.strip())
-        # stdout, stderr = process.communicate(input=board.pons_string)
-
-        # if process.returncode != 0:
-        #     logger.error(f"AI executable error: {stderr}")
-        #     raise Exception("AI executable failed to choose a move.")
-
-        # # Parse the output to get the chosen column
-        # chosen_column = int(stdout.strip())
-        # return chosen_column
-    
 def main():
     # Example usage
     board = Board()
-    ai_player = AIPascalPons(ai_executable_path="connect4_engine/core/c4solver")
+    ai_player = AIPascalPons()
     move = ai_player.choose_move(board)
     print(f"AI chose column: {move}")
 # if __name__ == "__main__":  
\ No newline at end of file
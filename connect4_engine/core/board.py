@@ -1,39 +1,326 @@
+import logging
+
 import numpy as np
 from typing import Tuple
 from utils.logger import logger
 
 
+class BoardGeometry:
+    """
+    Constant bitmasks of one board size, computed once and shared by every board of that size.
+    bit layout is the one of connect4ai/Position.hpp: every column takes height + 1 bits,
+    cell (row, col) is bit col * (height + 1) + row.
+    """
+    _cache = {}
+
+    @classmethod
+    def get(cls, width: int, height: int, connect: int) -> "BoardGeometry":
+        key = (width, height, connect)
+        if key not in cls._cache:
+            cls._cache[key] = cls(width, height, connect)
+        return cls._cache[key]
+
+    def __init__(self, width: int, height: int, connect: int):
+        if not 0 < width < 10:
+            raise Exception(f"Board width must be between 1 and 9 (got {width}), columns are single digits.")
+        self.width = width
+        self.height = height
+        self.connect = connect
+        self.stride = height + 1
+        self.column_bits = (1 << height) - 1
+        self.bottom_mask = sum(1 << (col * self.stride) for col in range(width))
+        self.board_mask = self.bottom_mask * self.column_bits
+        self.top_masks = [1 << (height - 1 + col * self.stride) for col in range(width)]
+        # shifts for vertical, horizontal and the two diagonals
+        self.directions = (1, self.stride, self.stride - 1, self.stride + 1)
+        # runs of connect stones are found by doubling: runs of 1, 2, 4... then the remainder
+        steps, run = [], 1
+        while 2 * run <= connect:
+            steps.append(run)
+            run *= 2
+        if run < connect:
+            steps.append(connect - run)
+        self.alignment_shifts = tuple(tuple(step * shift for step in steps) for shift in self.directions)
+
+        # every winning line as a mask, and the lines going through each cell (indexed by bit)
+        self.lines = []
+        self.cell_lines = [[] for _ in range(width * self.stride)]
+        for d_col, d_row in ((0, 1), (1, 0), (1, -1), (1, 1)):
+            for col in range(width):
+                for row in range(height):
+                    cells = [(row + i * d_row, col + i * d_col) for i in range(connect)]
+                    if not all(0 <= r < height and 0 <= c < width for r, c in cells):
+                        continue
+                    line = sum(1 << (c * self.stride + r) for r, c in cells)
+                    self.lines.append(line)
+                    for r, c in cells:
+                        self.cell_lines[c * self.stride + r].append(line)
+        self.cell_lines = [tuple(lines) for lines in self.cell_lines]
+
+
+class _GridView(np.ndarray):
+    """
+    Board.grid: the board's int8 grid, telling the board when it is written to.
+    views of it (rows, cells...) tell it too, copies and results of operations don't.
+    """
+
+    def __array_finalize__(self, obj):
+        self._board = getattr(obj, "_board", None) if self.base is not None else None
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        if self._board is not None:
+            self._board._grid_edited()
+
+
 class Board:
     # Constants for grid representation
     P_EMPTY = 0
     P_RED = 1
     P_YELLOW = 2
 
+    # Position::key3() is computed in a uint64_t
+    KEY3_MASK = (1 << 64) - 1
+
     # Constants for display
     value_to_symbol = {P_EMPTY: "O", P_RED: "R", P_YELLOW: "Y"}
 
-    def __init__(self):
+    def __init__(self, width: int = 7, height: int = 6, connect: int = 4):
         # Initialize board dimensions
-        self.width = 7
-        self.height = 6
-        self.pons_string = ''
-        self.grid = np.full((self.height, self.width), Board.P_EMPTY, dtype=np.int8)
-
-        # Initialize game status
-        self.done = False
-        self.winner = None
+        self.width = width
+        self.height = height
+        self.connect = connect
+        self.geometry = BoardGeometry.get(width, height, connect)
+        self._init_masks()
+        self._grid = np.full((self.height, self.width), Board.P_EMPTY, dtype=np.int8)
+        # move stack: '1'-based column characters and the player of every move,
+        # and done / winner (0 for none) before it for undo()
+        self._history = bytearray(self.width * self.height)
+        self._history_players = bytearray(self.width * self.height)
+        self._history_done = bytearray(self.width * self.height)
+        self._history_winners = bytearray(self.width * self.height)
+        self.heights = [0] * self.width
+        self.reset()
         # self.logger = get_logger(__name__)
 
+    def _init_masks(self):
+        """
+        Keep the geometry's masks on the board, they are read on every move
+        """
+        g = self.geometry
+        self._stride = g.stride
+        self._column_bits = g.column_bits
+        self._top_masks = g.top_masks
+        self._directions = g.directions
+        self._alignment_shifts = g.alignment_shifts
+        self._lines = g.lines
+        self._cell_lines = g.cell_lines
+
     def reset(self):
-        # Reset the board to its initial state
-        self.__init__()
+        """
+        Reset the board to its initial state, reusing the grid and the move stack
+        """
+        self._grid.fill(Board.P_EMPTY)
+        self._grid_dirty = False
+        self.heights[:] = [0] * self.width
+        self._plies = 0
+        self.moves = 0
+
+        # Bitboards, same layout as connect4ai/Position.hpp: every column takes height + 1 bits,
+        # cell (row, col) is bit col * (height + 1) + row.
+        # position holds the stones of the player to move, mask holds all the stones.
+        self.position = 0
+        self.mask = 0
+        self._to_move = Board.P_RED
+
+        # Initialize game status, kept up to date by drop_piece
+        self._done = False
+        self._winner = None
+        self._status_dirty = False
+
+    @property
+    def pons_string(self) -> str:
+        """
+        Moves played so far as 1-based column digits, the format c4solver reads
+        """
+        if self._grid_dirty:
+            self._sync()
+        return self._history[:self._plies].decode()
+
+    @property
+    def grid(self) -> np.ndarray:
+        """
+        height x width int8 view of the board, row 0 is the bottom.
+        it is kept in sync with the bitboards; writing into it (by indexing) rebuilds
+        the bitboards, the player to move and the moves from it on the next query.
+        """
+        view = self._grid.view(_GridView)
+        view._board = self
+        return view
+
+    def _grid_edited(self):
+        self._grid_dirty = True
+        self._status_dirty = True
+
+    @property
+    def to_move(self):
+        """
+        Color of the player to move
+        """
+        if self._grid_dirty:
+            self._sync()
+        return self._to_move
+
+    @property
+    def done(self) -> bool:
+        if self._status_dirty:
+            self.update()
+        return self._done
+
+    @property
+    def winner(self):
+        if self._status_dirty:
+            self.update()
+        return self._winner
+
+    def _sync(self):
+        """
+        Rebuild the bitboards, the player to move and the move stack from the grid
+        after it was edited directly
+        """
+        red = self._grid_bits(Board.P_RED)
+        yellow = self._grid_bits(Board.P_YELLOW)
+        reds, yellows = bin(red).count("1"), bin(yellow).count("1")
+        self.mask = red | yellow
+        self.moves = reds + yellows
+        for col in range(self.width):
+            column = (self.mask >> (col * self._stride)) & self._column_bits
+            self.heights[col] = ((column + 1) & ~column).bit_length() - 1  # lowest empty cell
+        # with as many stones each, whoever moved first is to move again
+        first = self._history_players[0] if self._plies else Board.P_RED
+        if reds != yellows:
+            first = Board.P_RED if reds > yellows else Board.P_YELLOW
+            self._to_move = Board.P_RED if reds < yellows else Board.P_YELLOW
+        else:
+            self._to_move = first
+        self.position = red if self._to_move == Board.P_RED else yellow
+        # pons_string and undo() follow the grid, empty when no move order can lead to it
+        order = self._move_order(first)
+        self._plies = len(order)
+        for i, col in enumerate(order):
+            self._history[i] = 49 + col
+            self._history_players[i] = first if i % 2 == 0 else Board.P_RED + Board.P_YELLOW - first
+            self._history_done[i] = self._history_winners[i] = 0
+        self._grid_dirty = False
+
+    def _move_order(self, first) -> list:
+        """
+        Columns played, in an order alternating the players from first that stacks the
+        stones of the grid, [] if there is none (floating stones, too many of one color)
+        """
+        stacks = [self._grid[:self.heights[col], col].tolist() for col in range(self.width)]
+        if sum(len(stack) for stack in stacks) != self.moves:
+            return []
+        second = Board.P_RED + Board.P_YELLOW - first
+        played = [0] * self.width
+        order = []
+        dead_ends = set()
+
+        def search() -> bool:
+            if len(order) == self.moves:
+                return True
+            state = tuple(played)
+            if state in dead_ends:
+                return False
+            player = first if len(order) % 2 == 0 else second
+            for col in range(self.width):
+                if played[col] < len(stacks[col]) and stacks[col][played[col]] == player:
+                    played[col] += 1
+                    order.append(col)
+                    if search():
+                        return True
+                    played[col] -= 1
+                    order.pop()
+            dead_ends.add(state)
+            return False
+
+        return order if search() else []
+
+    def _grid_bits(self, player) -> int:
+        """
+        Bitboard of the given player's stones, read from the grid
+        """
+        cells = np.flatnonzero(self._grid.T == player)  # index = col * height + row
+        return sum(1 << (int(i) + int(i) // self.height) for i in cells)
+
+    def player_bits(self, player) -> int:
+        """
+        Bitboard of the given player's stones
+        """
+        if self._grid_dirty:
+            self._sync()
+        return self.position if player == self._to_move else self.position ^ self.mask
+
+    @property
+    def first_player(self):
+        """
+        Color of the player who made the first move, None on an empty board
+        """
+        if self._grid_dirty:
+            self._sync()
+        return self._history_players[0] if self._plies else None
+
+    def key(self) -> int:
+        """
+        Compact key of the position, same as Position::key() in connect4ai.
+        any move order reaching the position gives the same key.
+        """
+        if self._grid_dirty:
+            self._sync()
+        return self.position + self.mask
+
+    def _key3(self, columns) -> int:
+        """
+        Base 3 key of the stones column by column (Position::partialKey3).
+        wraps around at 64 bits like the uint64_t it is computed in.
+        """
+        key = 0
+        for col in columns:
+            pos = 1 << (col * self._stride)
+            while pos & self.mask:
+                key = (key * 3 + (1 if pos & self.position else 2)) & Board.KEY3_MASK
+                pos <<= 1
+            key = key * 3 & Board.KEY3_MASK
+        return key
+
+    def canonical(self) -> Tuple[int, bool]:
+        """
+        Return (canonical_key(), mirrored), mirrored is True when the key was read
+        from the left-right mirror image, i.e. columns must be flipped to match it.
+        """
+        if self._grid_dirty:
+            self._sync()
+        forward = self._key3(range(self.width))
+        backward = self._key3(range(self.width - 1, -1, -1))
+        if backward < forward:
+            return backward // 3, True
+        return forward // 3, False
+
+    def canonical_key(self) -> int:
+        """
+        Symmetric base 3 key, same as Position::key3() used by the opening book.
+        a position and its left-right mirror image get the same key.
+        """
+        return self.canonical()[0]
 
     def display(self):
         """
         Display the board in text format
         """
+        if not logger.isEnabledFor(logging.INFO):
+            return  # don't build the text nobody will see
         lines = []
-        for row in self.grid[::-1]:
+        for row in self._grid[::-1]:
             line = " ".join(Board.value_to_symbol[cell] for cell in row)
             lines.append(line)
 
@@ -46,110 +333,177 @@ class Board:
         """
         return len(self.available_actions()) == 0 and self.winner is None
 
-    def _check_symbol(self, player):
+    def _has_alignment(self, bits: int) -> bool:
         """
-        Return the symbol to check for a win condition based on the player
+        Check if a bitboard contains connect aligned stones in any direction
         """
-        if player == self.P_RED:
-            check = "1 1 1 1"
-        else:
-            check = "2 2 2 2"
-        return check
+        for shifts in self._alignment_shifts:
+            m = bits
+            for shift in shifts:
+                m &= m >> shift
+            if m:
+                return True
+        return False
 
-    def _check_vertical_win(self, board_state, player):
+    def _is_winning_move(self, bits: int, move: int) -> bool:
         """
-        Check for a vertical win condition
+        Check if the stone at move (a single bit of bits) completes a line.
+        only looks at the precomputed lines going through that cell.
         """
-        check = self._check_symbol(player)
-        for col in range(self.width):
-            if check in np.array_str(board_state[:, col]):
+        for line in self._cell_lines[move.bit_length() - 1]:
+            if bits & line == line:
                 return True
         return False
 
-    def _check_horizontal_win(self, board_state, player):
+    def threats(self, player) -> int:
         """
-        Check for a horizontal win condition
+        Bitboard of the empty cells that would complete a line for the given player
         """
-        check = self._check_symbol(player)
-        for row in range(self.height):
-            if check in np.array_str(board_state[row, :]):
-                return True
-        return False
+        bits = self.player_bits(player)
+        opponent = bits ^ self.mask
+        threats = 0
+        for line in self._lines:
+            if not line & opponent:
+                empty = line & ~bits
+                if empty and not empty & (empty - 1):  # exactly one cell missing
+                    threats |= empty
+        return threats
 
-    def _check_leading_diag(self, board_state: np.ndarray, player):
+    def count_threats(self, player) -> int:
         """
-        Check for a win condition in the leading diagonals
+        Number of empty cells that would complete a line for the given player
         """
-        check = self._check_symbol(player)
-        for k in range(- self.height + 4, self.width - 3):
-            if check in np.array_str(board_state.diagonal(k)):
-                return True
-        return False
+        return bin(self.threats(player)).count("1")
 
-    def _check_counter_diag(self, board_state: np.ndarray, player):
+    def update(self):
         """
-        Check for a win condition in the counter diagonals
+        Recompute done / winner from scratch, for boards whose grid was edited directly
         """
-        board_state_flipped = np.fliplr(board_state)
-        return self._check_leading_diag(board_state_flipped, player)
+        self._status_dirty = False
+        self._winner = None
+        for player in (Board.P_RED, Board.P_YELLOW):
+            if self.is_player_winner(player):
+                self._winner = player
+                break
+        self._done = self._winner is not None or not self.available_actions()
 
     def is_player_winner(self, player):
         """
         Check if the given player has won
         """
-        board_state = np.array(self.grid)
-        return any([
-            self._check_vertical_win(board_state, player),
-            self._check_horizontal_win(board_state, player),
-            self._check_leading_diag(board_state, player),
-            self._check_counter_diag(board_state, player)
-        ])
+        return self._has_alignment(self.player_bits(player))
 
     def available_actions(self):
         """
         Return a list of available actions (columns where a piece can be dropped)
         """
-        return [col for col in range(self.width) if self.is_col_valid(col)]
+        if self._grid_dirty:
+            self._sync()
+        mask = self.mask
+        return [col for col, top in enumerate(self._top_masks) if not mask & top]
 
     def is_col_valid(self, col: int):
         """
         Check if a piece can be dropped in the given column
         """
-        if self.grid[-1][col] == Board.P_EMPTY:
-            return True
-        else:
-            return False
+        if self._grid_dirty:
+            self._sync()
+        return not self.mask & self._top_masks[col]
 
     def available_cell(self, col: int) -> int:
         """
         Return the row# of the available cell in the given column
         """
-        for row_num, cell in enumerate(self.grid[:, col]):
-            if cell == Board.P_EMPTY:
-                return row_num
-        return -1
+        if self._grid_dirty:
+            self._sync()
+        row = self.heights[col]
+        return row if row < self.height else -1
 
-    def drop_piece(self, col, player):
+    def drop_piece(self, col, player, quiet: bool = False):
         """
-        Drop a piece of the given player in the given column
+        Drop a piece of the given player in the given column.
+        quiet skips logging the board, for simulations and search.
         """
         if self.is_col_valid(col):
-            row = self.available_cell(col)
-            self.grid[row][col] = player
-            self.pons_string += str(col + 1) # assuming turns are always valid
+            self._place(col, player)
         else:
             raise Exception(f"Not valid move. Column {col} is full.")
-        self.display()
+        if not quiet:
+            self.display()
+
+    def play(self, col: int):
+        """
+        Play the given column for the player to move, undo() takes it back.
+        no logging and no allocation, meant for walking the game tree.
+        """
+        if self._grid_dirty:
+            self._sync()
+        if self.mask & self._top_masks[col]:
+            raise Exception(f"Not valid move. Column {col} is full.")
+        if self.done:
+            raise Exception("Not valid move. The game is already over.")
+        self._place(col, self._to_move)
+
+    def _place(self, col, player):
+        """
+        Put a stone on top of a non full column and update the game status
+        """
+        row = self.heights[col]
+        move = 1 << (col * self._stride + row)
+        if player != self._to_move:
+            self.position ^= self.mask  # look at the board from the dropping player's side
+        self.position ^= self.mask
+        self.mask |= move
+        self._to_move = Board.P_RED + Board.P_YELLOW - player
+        self.heights[col] = row + 1
+        self.moves += 1
+        self._grid[row, col] = player
+        self._history[self._plies] = 49 + col  # ord("1") + col
+        self._history_players[self._plies] = player
+        self._history_done[self._plies] = self._done
+        self._history_winners[self._plies] = self._winner or 0
+        self._plies += 1
+        if not self._status_dirty:
+            # only the lines through the new stone can have changed
+            if self._is_winning_move(self.position ^ self.mask, move):
+                self._done, self._winner = True, player
+            elif self.moves == self.width * self.height:
+                self._done = True
+
+    def undo(self):
+        """
+        Take back the last move played with play() or drop_piece()
+        """
+        if self._plies == 0:
+            raise Exception("No move to undo.")
+        if self._grid_dirty:
+            self._sync()
+        self._plies -= 1
+        col = self._history[self._plies] - 49
+        player = self._history_players[self._plies]
+        row = self.heights[col] - 1
+        self.mask ^= 1 << (col * self._stride + row)
+        self.position ^= self.mask  # back to the stones of the player who moved
+        self._to_move = player
+        self.heights[col] = row
+        self.moves -= 1
+        self._grid[row, col] = Board.P_EMPTY
+        # drop_piece() can go on after a win, the position before the move may be over already
+        self._done = bool(self._history_done[self._plies])
+        self._winner = self._history_winners[self._plies] or None
+
+    def copy(self) -> "Board":
+        """
+        Independent board with the same moves played (direct grid edits are not copied)
+        """
+        board = Board(self.width, self.height, self.connect)
+        for i in range(self._plies):
+            board._place(self._history[i] - 49, self._history_players[i])
+        return board
 
     def check_board_state_valid(self):
-        count_red = 0
-        count_yellow = 0
-        for row in self.grid:
-            for entry in row:
-                if entry == Board.P_RED:
-                    count_red += 1
-                elif entry == Board.P_YELLOW:
-                    count_yellow += 1
+        count_red = bin(self.player_bits(Board.P_RED)).count("1")
+        count_yellow = bin(self.player_bits(Board.P_YELLOW)).count("1")
 
         # red_should_have, yellow_should_have = Board.should_have_pieces(round)
         # if red_should_have != count_red or yellow_should_have != count_yellow:
@@ -0,0 +1,121 @@
+import numpy as np
+from core.board import Board
+
+
+class BoardBatch:
+    """
+    N boards stored as uint64 bitboard arrays (same layout as Board / Position.hpp).
+    every operation works on the whole batch at once, no python loop over the boards.
+    """
+
+    def __init__(self, n: int, width: int = 7, height: int = 6, connect: int = 4):
+        if width * (height + 1) > 64:
+            raise Exception(f"A {width}x{height} board does not fit in a uint64 bitboard.")
+        self.n = n
+        self.width = width
+        self.height = height
+        self.connect = connect
+        self._stride = height + 1
+
+        stride = np.uint64(self._stride)
+        cols = np.arange(width, dtype=np.uint64)
+        self._bottom_masks = np.uint64(1) << (cols * stride)
+        self._column_masks = np.uint64((1 << height) - 1) << (cols * stride)
+        self._top_masks = np.uint64(1) << (cols * stride + np.uint64(height - 1))
+        self._directions = [np.uint64(s) for s in (1, self._stride, self._stride - 1, self._stride + 1)]
+        # bit index of every (row, col) cell, used to expand bitboards into grids
+        rows = np.arange(height, dtype=np.uint64)
+        self._cell_shifts = rows[:, None] + cols[None, :] * stride
+
+        self.reset()
+
+    def reset(self):
+        """
+        Empty all the boards
+        """
+        self.position = np.zeros(self.n, dtype=np.uint64)   # stones of the player to move
+        self.mask = np.zeros(self.n, dtype=np.uint64)       # all stones
+        self.to_move = np.full(self.n, Board.P_RED, dtype=np.int8)
+        self.moves = np.zeros(self.n, dtype=np.int16)
+        self.winner = np.full(self.n, Board.P_EMPTY, dtype=np.int8)
+        self.done = np.zeros(self.n, dtype=bool)
+        # '1'-based column characters, 0 padded, so rows can be viewed as pons strings
+        self.history = np.zeros((self.n, self.width * self.height), dtype=np.uint8)
+
+    def legal_moves(self) -> np.ndarray:
+        """
+        (n, width) bool array of the columns that still have room
+        """
+        return (self.mask[:, None] & self._top_masks[None, :]) == 0
+
+    def player_bits(self, players) -> np.ndarray:
+        """
+        Bitboards of the given player's stones, players is a scalar or one player per board
+        """
+        other = np.asarray(players) != self.to_move
+        return np.where(other, self.position ^ self.mask, self.position)
+
+    def has_alignment(self, bits: np.ndarray) -> np.ndarray:
+        """
+        bool array, True where the bitboard contains connect aligned stones
+        """
+        found = np.zeros(bits.shape, dtype=bool)
+        for shift in self._directions:
+            m = bits
+            for i in range(1, self.connect):
+                m = m & (bits >> (shift * np.uint64(i)))
+            found |= m != 0
+        return found
+
+    def drop_piece(self, cols, players):
+        """
+        Drop one piece per board. cols[i] < 0 leaves board i untouched,
+        which is how finished games are skipped during self-play.
+        """
+        cols = np.asarray(cols, dtype=np.int64)
+        players = np.broadcast_to(np.asarray(players, dtype=np.int8), cols.shape)
+        active = cols >= 0
+        safe_cols = np.where(active, cols, 0)
+
+        full = active & ((self.mask & self._top_masks[safe_cols]) != 0)
+        if full.any():
+            raise Exception(f"Not valid move. Column is full on boards {np.flatnonzero(full).tolist()}.")
+
+        move = (self.mask + self._bottom_masks[safe_cols]) & self._column_masks[safe_cols]
+        move = np.where(active, move, np.uint64(0))
+
+        # look at each board from the dropping player's side, then play as in Position::play
+        flip = active & (players != self.to_move)
+        self.position ^= np.where(flip, self.mask, np.uint64(0))
+        self.position ^= np.where(active, self.mask, np.uint64(0))
+        self.mask |= move
+        self.to_move = np.where(active, Board.P_RED + Board.P_YELLOW - players, self.to_move).astype(np.int8)
+
+        idx = np.flatnonzero(active)
+        self.history[idx, self.moves[idx]] = safe_cols[idx] + ord("1")
+        self.moves += active
+
+        won = active & ~self.done & self.has_alignment(self.position ^ self.mask)
+        self.winner[won] = players[won]
+        self.done |= won | (self.moves == self.width * self.height)
+
+    def is_draw(self) -> np.ndarray:
+        return self.done & (self.winner == Board.P_EMPTY)
+
+    def pons_strings(self) -> np.ndarray:
+        """
+        Move history of every board as an array of pons strings
+        """
+        # the trailing 0 bytes are stripped by numpy's fixed-size bytes dtype
+        return self.history.view(f"S{self.history.shape[1]}").ravel().astype(str)
+
+    def grids(self) -> np.ndarray:
+        """
+        (n, height, width) int8 grids, row 0 is the bottom, same values as Board.grid
+        """
+        red = self.player_bits(Board.P_RED)
+        cells = lambda bits: ((bits[:, None, None] >> self._cell_shifts) & np.uint64(1)).astype(bool)
+        grids = np.full((self.n, self.height, self.width), Board.P_EMPTY, dtype=np.int8)
+        grids[cells(red)] = Board.P_RED
+        grids[cells(red ^ self.mask)] = Board.P_YELLOW
+        return grids
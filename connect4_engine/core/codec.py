@@ -0,0 +1,116 @@
+"""
+Compact binary snapshots of a Board.
+
+A snapshot is SNAPSHOT_SIZE bytes, little endian:
+    - 8 bytes: position key (Board.key())
+    - 1 byte: number of moves played
+    - 1 byte: color of the player who moved first
+    - 16 bytes: moves packed 3 bits each, first move in the lowest bits
+
+Only the standard 7x6 board fits in a snapshot.
+The key is redundant with the moves, it lets readers index or dedup positions
+without replaying them and is used to check the snapshot on decode.
+"""
+import struct
+from typing import Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from core.board import Board
+
+_SNAPSHOT = struct.Struct("<QBB16s")
+SNAPSHOT_SIZE = _SNAPSHOT.size
+SNAPSHOT_DTYPE = np.dtype([("key", "<u8"), ("moves", "u1"), ("first", "u1"), ("packed", "u1", 16)])
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def pack_moves(pons_string: str) -> bytes:
+    """
+    Pack a pons string into 16 bytes, 3 bits per move
+    """
+    packed = 0
+    for i, move in enumerate(pons_string):
+        packed |= (ord(move) - 49) << (3 * i)  # 49 = ord("1")
+    return packed.to_bytes(16, "little")
+
+
+def unpack_moves(packed: bytes, moves: int) -> List[int]:
+    """
+    Return the 0-based columns stored in packed
+    """
+    value = int.from_bytes(packed, "little")
+    return [(value >> (3 * i)) & 7 for i in range(moves)]
+
+
+def encode_into(board: Board, buf: Union[bytearray, memoryview], offset: int = 0):
+    """
+    Write the snapshot of board into buf at offset
+    """
+    if (board.width, board.height) != (7, 6):
+        raise Exception(f"Snapshots only support 7x6 boards, got {board.width}x{board.height}.")
+    moves = board.pons_string
+    first = board.first_player or Board.P_RED
+    _SNAPSHOT.pack_into(buf, offset, board.key(), len(moves), first, pack_moves(moves))
+
+
+def encode(board: Board) -> bytes:
+    buf = bytearray(SNAPSHOT_SIZE)
+    encode_into(board, buf)
+    return bytes(buf)
+
+
+def decode_from(buf: Buffer, offset: int = 0, board: Optional[Board] = None) -> Board:
+    """
+    Rebuild the board stored at offset. moves alternate starting with the stored first player.
+    pass board to reuse an existing Board instead of allocating one.
+    """
+    key, moves, first, packed = _SNAPSHOT.unpack_from(buf, offset)
+    if board is None:
+        board = Board()
+    else:
+        board.reset()
+    player = first
+    for col in unpack_moves(packed, moves):
+        board.drop_piece(col, player, quiet=True)
+        player = Board.P_RED + Board.P_YELLOW - player
+    if board.key() != key:
+        raise Exception(f"Corrupted board snapshot at offset {offset}.")
+    return board
+
+
+def decode(buf: Buffer) -> Board:
+    return decode_from(buf)
+
+
+def encode_many(boards: Iterable[Board], out: Optional[bytearray] = None) -> bytearray:
+    """
+    Concatenate the snapshots of boards, appending to out if given
+    """
+    boards = list(boards)
+    out = bytearray() if out is None else out
+    offset = len(out)
+    out.extend(bytes(SNAPSHOT_SIZE * len(boards)))
+    for board in boards:
+        encode_into(board, out, offset)
+        offset += SNAPSHOT_SIZE
+    return out
+
+
+def decode_many(buf: Buffer) -> Iterator[Board]:
+    """
+    Lazily decode a buffer of concatenated snapshots, reading it in place
+    """
+    view = memoryview(buf)
+    if len(view) % SNAPSHOT_SIZE:
+        raise Exception(f"Buffer size {len(view)} is not a multiple of {SNAPSHOT_SIZE}.")
+    for offset in range(0, len(view), SNAPSHOT_SIZE):
+        yield decode_from(view, offset)
+
+
+def snapshots(buf: Buffer) -> np.ndarray:
+    """
+    Zero copy structured array view (SNAPSHOT_DTYPE) over a buffer of snapshots,
+    for bulk filtering on key / moves without decoding any board.
+    """
+    return np.frombuffer(buf, dtype=SNAPSHOT_DTYPE)
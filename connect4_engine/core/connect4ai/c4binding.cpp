@@ -0,0 +1,65 @@
+/*
+ * C interface to the solver, so it can be loaded in process (e.g. with python ctypes)
+ * instead of talking to c4solver through pipes.
+ *
+ * Build: make -f Makefile_linux libc4solver.so   (or: make c4solver.dll)
+ */
+
+#include "Solver.hpp"
+#include <cstring>
+
+using namespace GameSolver::Connect4;
+
+extern "C" {
+
+int c4_width() {
+  return Position::WIDTH;
+}
+
+int c4_height() {
+  return Position::HEIGHT;
+}
+
+void* c4_new() {
+  return new Solver();
+}
+
+void c4_free(void* solver) {
+  delete static_cast<Solver*>(solver);
+}
+
+void c4_load_book(void* solver, const char* path) {
+  static_cast<Solver*>(solver)->loadBook(path);
+}
+
+/**
+ * Score of the position given by a sequence of 1-based columns.
+ * @return 0 on success, -1 if the sequence is invalid (full column, already won game, bad digit)
+ */
+int c4_solve(void* solver, const char* moves, int weak, int* score, unsigned long long* nodes) {
+  Solver* S = static_cast<Solver*>(solver);
+  Position P;
+  if(P.play(moves) != strlen(moves)) return -1;
+  unsigned long long before = S->getNodeCount();
+  *score = S->solve(P, weak != 0);
+  *nodes = S->getNodeCount() - before;
+  return 0;
+}
+
+/**
+ * Score of every column of the position, Solver::INVALID_MOVE for full columns.
+ * scores must have room for c4_width() values.
+ * @return 0 on success, -1 if the sequence is invalid
+ */
+int c4_analyze(void* solver, const char* moves, int weak, int* scores, unsigned long long* nodes) {
+  Solver* S = static_cast<Solver*>(solver);
+  Position P;
+  if(P.play(moves) != strlen(moves)) return -1;
+  unsigned long long before = S->getNodeCount();
+  std::vector<int> result = S->analyze(P, weak != 0);
+  for(int i = 0; i < Position::WIDTH; i++) scores[i] = result[i];
+  *nodes = S->getNodeCount() - before;
+  return 0;
+}
+
+}
@@ -19,6 +19,7 @@
 #include "Solver.hpp"
 #include <iostream>
 #include <algorithm>
+#include <chrono>
 
 
 using namespace GameSolver::Connect4;
@@ -38,6 +39,8 @@ int main(int argc, char** argv) {
   Solver solver;
   bool weak = false;
   bool analyze = false;
+  bool scores_out = false;
+  bool timing = false;
 
   std::string opening_book = "7x6.book";
   for(int i = 1; i < argc; i++) {
@@ -49,6 +52,12 @@ int main(int argc, char** argv) {
       else if(argv[i][1] == 'a') { // paramater -a: make an analysis of all possible moves
         analyze = true;
       }
+      else if(argv[i][1] == 's') { // paramater -s: with -a, print the score of every column instead of the best one
+        scores_out = true;
+      }
+      else if(argv[i][1] == 't') { // paramater -t: without -a, also print the nodes explored and the microseconds spent
+        timing = true;
+      }
     }
   }
   solver.loadBook(opening_book);
@@ -59,10 +68,16 @@ int main(int argc, char** argv) {
     Position P;
     if(P.play(line) != line.size()) {
       std::cerr << "Line " << l << ": Invalid move " << (P.nbMoves() + 1) << " \"" << line << "\"" << std::endl;
+      std::cout << std::endl; // one output line per input line, so callers can match answers to queries
     } else {
       // std::cout << line;
       if(analyze) {
         std::vector<int> scores = solver.analyze(P, weak);
+        if(scores_out) {
+          for(int i = 0; i < Position::WIDTH; i++) std::cout << (i ? " " : "") << scores[i];
+          std::cout << std::endl;
+          continue;
+        }
         // Find an iterator to the largest element
         auto maxElementIterator = std::max_element(scores.begin(), scores.end());
 
@@ -70,11 +85,17 @@ int main(int argc, char** argv) {
         int indexOfLargest = std::distance(scores.begin(), maxElementIterator);
 
         std::cout << indexOfLargest << std::endl; // idx starts from 0 as we like yay
-        // for(int i = 0; i < Position::WIDTH; i++) std::cout << " " << scores[i];
       }
       else {
+        unsigned long long nodes = solver.getNodeCount();
+        auto start = std::chrono::steady_clock::now();
         int score = solver.solve(P, weak);
-        // std::cout << " " << score;
+        std::cout << score;
+        if(timing) {
+          auto micros = std::chrono::duration_cast<std::chrono::microseconds>(std::chrono::steady_clock::now() - start).count();
+          std::cout << " " << solver.getNodeCount() - nodes << " " << micros;
+        }
+        std::cout << std::endl;
       }
       // std::cout << std::endl;
     }
@@ -0,0 +1,213 @@
+import os
+import queue
+import struct
+import threading
+import zlib
+from typing import List, NamedTuple, Optional, Tuple
+
+from utils.logger import logger
+
+# kind, three arguments (the last two 16 bits: puck numbers keep counting from game to game),
+# crc32 of the bytes before it. a torn or corrupt record ends the journal
+RECORD = struct.Struct("<2B2HI")
+_PAYLOAD = RECORD.size - 4
+
+# kinds: START (player starts, pucks the player and the AI took before the game),
+# MOVE (side, column, puck number), END (winner color, 0 for a draw)
+START, MOVE, END = 1, 2, 3
+# sides of a MOVE
+PLAYER, AI = 0, 1
+
+
+class LiveGame(NamedTuple):
+    """
+    Game the journal was in the middle of: who started, (side, column, puck number) of every move,
+    pucks the player and the AI took before it
+    """
+    player_starts: bool
+    moves: List[Tuple[int, int, int]]
+    pucks: Tuple[int, int] = (0, 0)
+
+
+def pack_record(kind: int, a: int = 0, b: int = 0, c: int = 0) -> bytes:
+    payload = RECORD.pack(kind, a, b, c, 0)[:_PAYLOAD]
+    return RECORD.pack(kind, a, b, c, zlib.crc32(payload))
+
+
+def read_records(data: bytes) -> Tuple[List[Tuple[int, int, int, int]], int]:
+    """
+    (kind, a, b, c) of the valid records at the start of data, and the bytes they take
+    """
+    records = []
+    end = len(data) - len(data) % RECORD.size
+    for offset in range(0, end, RECORD.size):
+        kind, a, b, c, crc = RECORD.unpack_from(data, offset)
+        if zlib.crc32(data[offset:offset + _PAYLOAD]) != crc or kind not in (START, MOVE, END):
+            return records, offset
+        records.append((kind, a, b, c))
+    return records, end
+
+
+def live_game(records: List[Tuple[int, int, int, int]]) -> Optional[LiveGame]:
+    """
+    The game started last if it has no END record yet
+    """
+    game = None
+    for kind, a, b, c in records:
+        if kind == START:
+            game = LiveGame(bool(a), [], (b, c))
+        elif kind == END:
+            game = None
+        elif game is not None:
+            game.moves.append((a, b, c))
+    return game
+
+
+class GameJournal:
+    """
+    Append only journal of the games, to resume a game after the controller died.
+
+    records are queued by the game and written by a background thread, which fsyncs
+    everything queued since its last write at once (group commit): recording a move
+    costs the turn a queue put. once the file grows past max_bytes it is compacted to
+    the game in progress, the old file kept as path.1 .. path.<keep>.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 20, keep: int = 1):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep = keep
+        if os.path.exists(path + ".tmp"):
+            os.remove(path + ".tmp")  # a compaction that didn't finish, the journal is still whole
+        data = b""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+        records, valid = read_records(data)
+        if valid < len(data):
+            logger.warning(f"Journal {path}: dropping {len(data) - valid} bytes of torn or corrupt records")
+        # game to resume, None if the last game ended
+        self.live = live_game(records)
+        self._live_records = [] if self.live is None else self._records_of(self.live)
+        self._file = open(path, "r+b" if data else "wb")
+        self._file.truncate(valid)
+        self._file.seek(valid)
+        self._size = valid
+        self._queue = queue.Queue()
+        self._durable = threading.Condition()
+        self._queued = 0
+        self._written = 0
+        self.syncs = 0
+        self.rotations = 0
+        self._writer = threading.Thread(target=self._write_loop, name="journal", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _records_of(game: LiveGame) -> List[bytes]:
+        return [pack_record(START, int(game.player_starts), *game.pucks)] + \
+               [pack_record(MOVE, side, column, puck_no) for side, column, puck_no in game.moves]
+
+    def game_started(self, player_starts: bool, player_pucks: int = 0, ai_pucks: int = 0):
+        self._append(pack_record(START, int(player_starts), player_pucks, ai_pucks))
+
+    def move(self, side: int, column: int, puck_no: int):
+        self._append(pack_record(MOVE, side, column, puck_no))
+
+    def game_ended(self, winner: Optional[int]):
+        self._append(pack_record(END, winner or 0))
+
+    def _append(self, record: bytes):
+        with self._durable:
+            self._queued += 1
+            self._queue.put(record)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until everything recorded so far is on disk, False on timeout
+        """
+        with self._durable:
+            target = self._queued
+            return self._durable.wait_for(lambda: self._written >= target, timeout)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = batch[-1] is None
+            records = [record for record in batch if record is not None]
+            try:
+                if records:
+                    self._write(records)
+            except OSError as e:
+                logger.error(f"Journal {self.path}: write failed: {e}")
+            with self._durable:
+                self._written += len(records)
+                self._durable.notify_all()
+            if closing:
+                return
+
+    def _write(self, records: List[bytes]):
+        data = b"".join(records)
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.syncs += 1
+        self._size += len(data)
+        for record in records:
+            kind = record[0]
+            if kind == START:
+                self._live_records = [record]
+            elif kind == END:
+                self._live_records = []
+            elif self._live_records:
+                self._live_records.append(record)
+        if self._size > self.max_bytes:
+            self._compact()
+
+    def _compact(self):
+        """
+        Replace the journal by the records of the game in progress, atomically
+        """
+        data = b"".join(self._live_records)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()  # Windows can't replace an open file
+        try:
+            if self.keep:
+                for i in range(self.keep - 1, 0, -1):
+                    if os.path.exists(f"{self.path}.{i}"):
+                        os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+                if os.path.exists(f"{self.path}.1"):
+                    os.remove(f"{self.path}.1")
+                os.link(self.path, f"{self.path}.1")
+            os.replace(tmp_path, self.path)
+            _fsync_dir(os.path.dirname(os.path.abspath(self.path)))
+            self.rotations += 1
+        finally:
+            self._file = open(self.path, "ab")
+            self._size = self._file.tell()
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+
+
+def _fsync_dir(path: str):
+    """
+    Make a rename durable, directories can't be opened on Windows where it isn't needed
+    """
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
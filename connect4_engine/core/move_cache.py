@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from core.board import Board
+from utils.logger import logger
+
+
+def _signed(key: int) -> int:
+    # sqlite integers are signed 64 bits, canonical keys are unsigned
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+class MoveCache:
+    """
+    Best move per position, keyed on Board.canonical_key() so mirror images share an entry.
+    moves are stored for the canonical orientation and flipped back on lookup.
+    a bounded in-memory LRU sits in front of an optional sqlite file that survives restarts.
+    """
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 100_000):
+        self.path = path
+        self.capacity = capacity
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()  # the cache is shared with pondering threads
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            with self._db:
+                self._db.execute("CREATE TABLE IF NOT EXISTS moves (key INTEGER PRIMARY KEY, col INTEGER NOT NULL)")
+            logger.debug(f"Move cache opened at {path}")
+
+    def get(self, board: Board) -> Optional[int]:
+        """
+        Cached best column for the board, None on a miss
+        """
+        key, mirrored = board.canonical()
+        with self._lock:
+            col = self._memory.get(key)
+            if col is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            elif self._db is not None:
+                row = self._db.execute("SELECT col FROM moves WHERE key = ?", (_signed(key),)).fetchone()
+                if row is not None:
+                    col = row[0]
+                    self._remember(key, col)
+                    self.disk_hits += 1
+            if col is None:
+                self.misses += 1
+                return None
+        return board.width - 1 - col if mirrored else col
+
+    def put(self, board: Board, col: int):
+        key, mirrored = board.canonical()
+        if mirrored:
+            col = board.width - 1 - col
+        with self._lock:
+            self._remember(key, col)
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("INSERT OR REPLACE INTO moves (key, col) VALUES (?, ?)", (_signed(key), col))
+
+    def _remember(self, key: int, col: int):
+        self._memory[key] = col
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
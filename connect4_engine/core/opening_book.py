@@ -0,0 +1,153 @@
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional
+
+from core.board import Board
+from core.solver_binding import INVALID_MOVE
+from core.solver_pool import DEFAULT_BOOK
+from utils.logger import logger
+
+# width, height, depth, key bytes, value bytes, log2(size)
+HEADER = struct.Struct("<6B")
+KEY_FORMATS = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+
+def next_prime(n: int) -> int:
+    """
+    Smallest prime >= n, the size of a TranspositionTable of 2^log_size entries
+    """
+    while any(n % d == 0 for d in range(2, int(n ** 0.5) + 1)):
+        n += 1
+    return n
+
+
+def min_score(width: int, height: int) -> int:
+    """
+    Position::MIN_SCORE, book values are stored as score - MIN_SCORE + 1 (0 means missing)
+    """
+    return -(width * height) // 2 + 3
+
+
+class OpeningBook:
+    """
+    Read only view of a connect4ai opening book file (OpeningBook.hpp format), memory mapped:
+    lookups read the mapped keys and values in place, and every process opening the
+    same book shares its pages through the page cache.
+
+    the book is a TranspositionTable: entry key3 % size holds the key truncated to
+    key_bytes and the score of the position, for positions of at most depth moves.
+    """
+
+    def __init__(self, path: str = DEFAULT_BOOK, width: int = 7, height: int = 6):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        file_width, file_height, self.depth, self.key_bytes, value_bytes, self.log_size = \
+            HEADER.unpack_from(self._mmap)
+        if (file_width, file_height) != (width, height):
+            raise Exception(f"Opening book {path} is for {file_width}x{file_height} boards, not {width}x{height}.")
+        if self.key_bytes not in KEY_FORMATS or value_bytes != 1:
+            raise Exception(f"Opening book {path} has unsupported entries ({self.key_bytes} byte keys, {value_bytes} byte values).")
+        self.width, self.height = width, height
+        self.size = next_prime(1 << self.log_size)
+        if len(self._mmap) < HEADER.size + self.size * (self.key_bytes + 1):
+            raise Exception(f"Opening book {path} is truncated.")
+        self._key_mask = (1 << (8 * self.key_bytes)) - 1
+        self._min_score = min_score(width, height)
+        view = memoryview(self._mmap)
+        keys_end = HEADER.size + self.size * self.key_bytes
+        self._keys = view[HEADER.size:keys_end].cast(KEY_FORMATS[self.key_bytes])
+        self._values = view[keys_end:keys_end + self.size]
+
+    def get_key(self, key3: int) -> Optional[int]:
+        """
+        Score stored for a Position::key3(), None if the book does not have it
+        """
+        i = key3 % self.size
+        if self._keys[i] != key3 & self._key_mask:
+            return None
+        value = self._values[i]
+        return value + self._min_score - 1 if value else None
+
+    def get(self, board: Board) -> Optional[int]:
+        """
+        Score of the position for the player to move, None when it is not in the book
+        """
+        if board.moves > self.depth:
+            return None
+        return self.get_key(board.canonical_key())
+
+    def analyze(self, board: Board) -> Optional[List[int]]:
+        """
+        Score of every column like Solver::analyze, INVALID_MOVE for full columns.
+        None unless every reply is in the book.
+        """
+        if board.moves + 1 > self.depth or board.done:
+            return None
+        scores = [INVALID_MOVE] * self.width
+        own = board.player_bits(board.to_move)
+        child = board.copy()
+        for col in board.available_actions():
+            move = 1 << (col * board.geometry.stride + board.heights[col])
+            if board._is_winning_move(own | move, move):
+                scores[col] = (self.width * self.height + 1 - board.moves) // 2
+                continue
+            child.play(col)
+            score = self.get_key(child.canonical_key())
+            child.undo()
+            if score is None:
+                return None
+            scores[col] = -score
+        return scores
+
+    def choose_move(self, board: Board) -> Optional[int]:
+        """
+        Best column if the book covers the position, the first one on ties like c4solver -a
+        """
+        scores = self.analyze(board)
+        if scores is None:
+            return None
+        return scores.index(max(scores))
+
+    def close(self):
+        self._keys.release()
+        self._values.release()
+        self._mmap.close()
+
+
+def save_book(path: str, scores: Dict[int, int], depth: int, log_size: int,
+              key_bytes: int = 2, width: int = 7, height: int = 6):
+    """
+    Write {key3: score} as an opening book file the solver can load (OpeningBook::load).
+    like TranspositionTable::put, a key replaces whatever was in its slot.
+    the solver only accepts log_size 21 to 27 and key_bytes 1, 2 or 4.
+    """
+    size = next_prime(1 << log_size)
+    keys = bytearray(size * key_bytes)
+    values = bytearray(size)
+    key_view = memoryview(keys).cast(KEY_FORMATS[key_bytes])
+    key_mask = (1 << (8 * key_bytes)) - 1
+    offset = 1 - min_score(width, height)
+    for key3, score in scores.items():
+        i = key3 % size
+        key_view[i] = key3 & key_mask
+        values[i] = score + offset
+    key_view.release()
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(width, height, depth, key_bytes, 1, log_size))
+        f.write(keys)
+        f.write(values)
+
+
+def load_book(path: str = DEFAULT_BOOK, width: int = 7, height: int = 6) -> Optional[OpeningBook]:
+    """
+    OpeningBook if the book file exists and is valid, None otherwise
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return OpeningBook(path, width, height)
+    except Exception as e:
+        logger.warning(f"Could not load opening book {path}: {e}")
+        return None
@@ -0,0 +1,93 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from core.board import Board
+from utils.logger import logger
+
+
+class Ponderer:
+    """
+    Uses the player's thinking time to solve the AI's reply to each possible player move.
+    runs on its own thread with its own AI (so its own solver process), within a time budget
+    and a maximum number of positions. replies are looked up by position key.
+    """
+
+    def __init__(self, ai, player_color: int, time_budget: float = 60.0, max_positions: int = 7):
+        self.ai = ai
+        self.player_color = player_color
+        self.time_budget = time_budget
+        self.max_positions = max_positions
+        self._replies: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, board: Board):
+        """
+        Start pondering the position where the player is about to move
+        """
+        self.cancel()
+        with self._lock:
+            self._replies = {}
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(board.copy(), self._cancelled), daemon=True)
+        self._thread.start()
+
+    def _run(self, board: Board, cancelled: threading.Event):
+        deadline = time.monotonic() + self.time_budget
+        # a search still going at the deadline is aborted, not waited for
+        expiry = threading.Timer(self.time_budget, self._stop, args=(cancelled,))
+        expiry.daemon = True
+        expiry.start()
+        try:
+            self._ponder(board, cancelled, deadline)
+        finally:
+            expiry.cancel()
+            expiry.join()  # an interrupt at the deadline is over before the pass is
+        logger.debug(f"Pondering done, {len(self._replies)} replies ready")
+
+    def _ponder(self, board: Board, cancelled: threading.Event, deadline: float):
+        center = (board.width - 1) / 2
+        # center columns first, they are the likeliest player moves
+        for col in sorted(board.available_actions(), key=lambda c: abs(c - center)):
+            if cancelled.is_set() or time.monotonic() > deadline or len(self._replies) >= self.max_positions:
+                break
+            board.drop_piece(col, self.player_color, quiet=True)
+            try:
+                if not board.done:
+                    reply = self.ai.choose_move(board)
+                    with self._lock:
+                        if not cancelled.is_set():
+                            self._replies[board.key()] = reply
+            except Exception as e:
+                if not cancelled.is_set():
+                    logger.warning(f"Pondering {board.pons_string} failed: {e}")
+            finally:
+                board.undo()
+
+    def take(self, board: Board) -> Optional[int]:
+        """
+        Reply pondered for the board (after the player's move), None if it wasn't solved.
+        stops pondering either way.
+        """
+        with self._lock:
+            reply = self._replies.get(board.key())
+        self.cancel()
+        return reply
+
+    def cancel(self):
+        """
+        Stop pondering, aborting the search in flight if the AI supports it
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._stop(self._cancelled)
+
+    def _stop(self, cancelled: threading.Event):
+        if cancelled.is_set():
+            return
+        cancelled.set()
+        interrupt = getattr(self.ai, "interrupt", None)
+        if interrupt is not None:
+            interrupt()
@@ -0,0 +1,172 @@
+import asyncio
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from core.solver_pool import DEFAULT_BOOK, SolverError, SolverTimeout, parse_analysis, solver_command
+from utils.logger import logger
+
+
+class AsyncSolverClient:
+    """
+    One c4solver subprocess driven from an asyncio event loop.
+    queries are pipelined: up to pipeline_depth positions are written ahead, c4solver answers
+    one line per position in order, so answers are matched to queries first in first out.
+    a cancelled query (asyncio.wait_for timeout, superseded pondering...) that was not sent yet
+    is dropped, one already sent has its answer discarded. interrupt() also aborts the search
+    in progress by restarting the process.
+
+        async with AsyncSolverClient(executable) as solver:
+            col, scores = await solver.analyze(board)
+    """
+
+    def __init__(self,
+                 executable: str,
+                 book: str = DEFAULT_BOOK,
+                 analyze: bool = True,
+                 weak: bool = False,
+                 pipeline_depth: int = 4):
+        self.args = solver_command(executable, book, analyze=analyze, weak=weak)
+        self.pipeline_depth = pipeline_depth
+        self.proc = None
+        self._reader = None
+        # not sent yet / sent and waiting for their answer line, oldest first
+        self._waiting: Deque[Tuple[str, asyncio.Future]] = deque()
+        self._in_flight: Deque[asyncio.Future] = deque()
+        self.restarts = 0
+        self.answered = 0
+        self.discarded = 0
+        self.dropped = 0
+
+    async def __aenter__(self) -> "AsyncSolverClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        # stderr is kept out of stdout, the solver reports a missing book / bad moves there
+        self.proc = await asyncio.create_subprocess_exec(
+            *self.args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self._reader = asyncio.get_running_loop().create_task(self._read(self.proc))
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    async def query(self, line: str, timeout: Optional[float] = None) -> str:
+        """
+        Send one position and return the stripped answer line.
+        SolverTimeout after timeout seconds, the query is cancelled then.
+        """
+        if not self.alive():
+            if self.proc is not None:
+                logger.warning("Solver process is gone, restarting it")
+                self.restarts += 1
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append((line, future))
+        self._pump()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise SolverTimeout(f"Solver did not answer within {timeout:.3f}s for '{line}'")
+
+    async def analyze(self, board, timeout: Optional[float] = None) -> Tuple[int, Optional[List[int]]]:
+        """
+        (best column, scores of every column) for the board, see parse_analysis
+        """
+        out = await self.query(board.pons_string, timeout)
+        if not out:
+            raise SolverError(f"Solver rejected position '{board.pons_string}'")
+        return parse_analysis(out)
+
+    async def choose_move(self, board, timeout: Optional[float] = None) -> int:
+        return (await self.analyze(board, timeout))[0]
+
+    def _pump(self):
+        """
+        Write waiting queries while the pipeline has room, skipping the cancelled ones
+        """
+        while self._waiting and len(self._in_flight) < self.pipeline_depth:
+            line, future = self._waiting.popleft()
+            if future.done():
+                self.dropped += 1
+                continue
+            try:
+                self.proc.stdin.write((line + "\n").encode())
+            except (BrokenPipeError, ConnectionResetError) as e:
+                future.set_exception(SolverError(f"Solver process is gone: {e}"))
+                continue
+            self._in_flight.append(future)
+
+    async def _read(self, proc):
+        """
+        Match every answer line to the oldest query in flight
+        """
+        while True:
+            line = await proc.stdout.readline()
+            if not line:
+                break
+            if not self._in_flight:
+                logger.warning(f"Unexpected solver output: {line!r}")
+                continue
+            future = self._in_flight.popleft()
+            if future.done():
+                self.discarded += 1
+            else:
+                future.set_result(line.decode().strip())
+                self.answered += 1
+            self._pump()
+        await proc.wait()
+        if proc is self.proc:
+            self._fail_all(SolverError(f"Solver exited with code {proc.returncode}"))
+
+    def _fail_all(self, error: Exception):
+        """
+        Fail every query waiting or in flight, their answers will never come
+        """
+        futures = list(self._in_flight) + [future for _, future in self._waiting]
+        self._in_flight.clear()
+        self._waiting.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    async def interrupt(self):
+        """
+        Abort the search in progress and every pending query (they get a SolverError),
+        e.g. when the position being pondered did not happen
+        """
+        await self._stop()
+        self._fail_all(SolverError("Query was interrupted"))
+        self.restarts += 1
+        await self.start()
+
+    async def _stop(self):
+        if self.proc is None:
+            return
+        proc, self.proc = self.proc, None
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        if self._reader is not None:
+            await self._reader
+            self._reader = None
+
+    async def close(self):
+        await self._stop()
+        self._fail_all(SolverError("Solver client closed"))
+
+    def stats(self) -> dict:
+        return {
+            "waiting": len(self._waiting),
+            "in_flight": len(self._in_flight),
+            "answered": self.answered,
+            "discarded": self.discarded,
+            "dropped": self.dropped,
+            "restarts": self.restarts,
+        }
@@ -0,0 +1,97 @@
+import ctypes
+import os
+import threading
+from typing import List, Optional
+
+from core.board import Board
+from core.solver_pool import DEFAULT_BOOK, SolverError
+from utils.logger import logger
+
+# built by `make -f Makefile_linux libc4solver.so` (or `make c4solver.dll`) in core/connect4ai
+LIBRARY_NAMES = {"nt": "c4solver.dll", "posix": "libc4solver.so"}
+DEFAULT_LIBRARY = os.path.join("connect4_engine", "core", "connect4ai", LIBRARY_NAMES.get(os.name, "libc4solver.so"))
+
+INVALID_MOVE = -1000  # Solver::INVALID_MOVE, score of a full column
+
+
+class SolverBinding:
+    """
+    The connect4ai solver loaded in process through ctypes.
+    ctypes releases the GIL for the duration of each call, so other threads keep running
+    during a search. one Solver (and transposition table) per instance, calls are serialized.
+    """
+
+    def __init__(self, library_path: str = DEFAULT_LIBRARY, book: Optional[str] = DEFAULT_BOOK):
+        self.library_path = library_path
+        self.book = book
+        self._lib = ctypes.CDLL(os.path.abspath(library_path))
+        self._lib.c4_new.restype = ctypes.c_void_p
+        self._lib.c4_free.argtypes = [ctypes.c_void_p]
+        self._lib.c4_load_book.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+        for fn in (self._lib.c4_solve, self._lib.c4_analyze):
+            fn.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int,
+                           ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_ulonglong)]
+            fn.restype = ctypes.c_int
+        self.width = self._lib.c4_width()
+        self._solver = self._lib.c4_new()
+        self._lock = threading.Lock()
+        self.last_nodes = 0
+        if book is not None:
+            self.load_book(book)
+
+    def load_book(self, path: str):
+        """
+        Load an opening book, a missing file leaves the solver without book
+        """
+        with self._lock:
+            self._lib.c4_load_book(self._solver, path.encode())
+
+    def solve(self, moves: str, weak: bool = False) -> int:
+        """
+        Score of the position for the player to move
+        """
+        score = ctypes.c_int()
+        nodes = ctypes.c_ulonglong()
+        with self._lock:
+            if self._lib.c4_solve(self._solver, moves.encode(), int(weak), ctypes.byref(score), ctypes.byref(nodes)):
+                raise SolverError(f"Solver rejected position '{moves}'")
+            self.last_nodes = nodes.value
+        return score.value
+
+    def analyze(self, moves: str, weak: bool = False) -> List[int]:
+        """
+        Score of every column, INVALID_MOVE for full columns
+        """
+        scores = (ctypes.c_int * self.width)()
+        nodes = ctypes.c_ulonglong()
+        with self._lock:
+            if self._lib.c4_analyze(self._solver, moves.encode(), int(weak), scores, ctypes.byref(nodes)):
+                raise SolverError(f"Solver rejected position '{moves}'")
+            self.last_nodes = nodes.value
+        return list(scores)
+
+    def choose_move(self, board: Board, weak: bool = False) -> int:
+        """
+        Best column, the first one on ties like c4solver -a
+        """
+        scores = self.analyze(board.pons_string, weak)
+        return scores.index(max(scores))
+
+    def close(self):
+        with self._lock:
+            if self._solver:
+                self._lib.c4_free(self._solver)
+                self._solver = None
+
+
+def load_binding(library_path: str = DEFAULT_LIBRARY, book: Optional[str] = DEFAULT_BOOK) -> Optional[SolverBinding]:
+    """
+    SolverBinding if the shared library was built, None otherwise
+    """
+    if not os.path.exists(library_path):
+        return None
+    try:
+        return SolverBinding(library_path, book)
+    except (OSError, AttributeError) as e:
+        logger.warning(f"Could not load solver library {library_path}: {e}")
+        return None
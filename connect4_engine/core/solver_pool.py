@@ -0,0 +1,294 @@
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from utils.logger import logger
+
+DEFAULT_BOOK = "connect4_engine/core/7x6.book"
+
+# seconds a query may take unless the pool is given a timeout: a silent solver is respawned
+DEFAULT_TIMEOUT = 60.0
+
+# an invalid position, answered by an empty line since c4solver prints one line per input.
+# older builds print nothing and would leave every query after it waiting
+PROBE = "0"
+PROBE_TIMEOUT = 10.0
+
+
+class SolverError(Exception):
+    """
+    The solver process died or refused the query
+    """
+
+
+class SolverTimeout(SolverError):
+    """
+    The solver did not answer before the deadline
+    """
+
+
+def default_solver_path() -> str:
+    """
+    c4solver binary shipped for the current platform
+    """
+    name = "c4solver.exe" if os.name == "nt" else "c4solver"
+    return os.path.join("connect4_engine", "core", name)
+
+
+def solver_command(executable: str, book: str = DEFAULT_BOOK, analyze: bool = True, weak: bool = False,
+                   timing: bool = False) -> List[str]:
+    """
+    Command line of a c4solver process.
+    analyze asks for the scores of every column (-a -s), solvers built before -s
+    ignore it and print the best column only.
+    timing (solve mode) adds the nodes explored and microseconds spent to every answer.
+    """
+    args = [executable]
+    if analyze:
+        args += ["-a", "-s"]
+    if weak:
+        args.append("-w")
+    if timing:
+        args.append("-t")
+    return args + ["-b", book]
+
+
+def parse_analysis(out: str) -> Tuple[int, Optional[List[int]]]:
+    """
+    (best column, scores of every column) from a c4solver -a answer line.
+    scores is None for solvers that only print the best column.
+    the first best column wins ties, like c4solver.
+    """
+    fields = out.split()
+    if len(fields) == 1:
+        return int(fields[0]), None
+    scores = [int(field) for field in fields]
+    return scores.index(max(scores)), scores
+
+
+class SolverProcess:
+    """
+    One c4solver subprocess answering one line per query.
+    stdout is read by a background thread so answers can be waited for with a timeout.
+    """
+
+    def __init__(self, args: List[str]):
+        self.args = args
+        self.restarts = 0
+        self.proc = None
+        self.start()
+
+    def start(self):
+        # stderr is kept out of stdout, the solver reports a missing book / bad moves there
+        self.proc = subprocess.Popen(
+            self.args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        self._lines = queue.Queue()
+        self._reader = threading.Thread(target=self._read, args=(self.proc, self._lines), daemon=True)
+        self._reader.start()
+
+    @staticmethod
+    def _read(proc, lines):
+        try:
+            for line in proc.stdout:
+                lines.put(line)
+        except (OSError, ValueError):
+            pass
+        lines.put(None)  # EOF, the process is gone
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def query(self, line: str, timeout: Optional[float] = None) -> str:
+        """
+        Send one position and return the stripped answer line
+        """
+        try:
+            self.proc.stdin.write(line + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError) as e:
+            raise SolverError(f"Solver process is gone: {e}")
+        try:
+            out = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            raise SolverTimeout(f"Solver did not answer within {timeout:.3f}s for '{line}'")
+        if out is None:
+            raise SolverError(f"Solver exited while solving '{line}'")
+        return out.strip()
+
+    def restart(self):
+        """
+        Kill the process (it may be stuck in a search) and start a fresh one
+        """
+        self.close()
+        self.restarts += 1
+        self.start()
+
+    def close(self):
+        if self.proc is None:
+            return
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        self._reader.join(timeout=1.0)
+        for pipe in (self.proc.stdin, self.proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class SolverPool:
+    """
+    K warm solver processes shared by several games / tools.
+    a query takes whichever worker is idle (the least busy one), idle workers rotate in FIFO order.
+    workers that time out or crash are killed and respawned, a query times out after
+    DEFAULT_TIMEOUT seconds unless the pool is given another timeout (None waits forever).
+    """
+
+    def __init__(self,
+                 executable: str,
+                 book: str = DEFAULT_BOOK,
+                 size: int = 2,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 analyze: bool = True,
+                 weak: bool = False,
+                 timing: bool = False):
+        self.executable = executable
+        self.book = book
+        self.args = solver_command(executable, book, analyze=analyze, weak=weak, timing=timing)
+        self.size = size
+        self.timeout = timeout
+        self._workers = [SolverProcess(self.args) for _ in range(size)]
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._lock = threading.Lock()
+        self._created = time.monotonic()
+        self._queries = 0
+        self._timeouts = 0
+        self._crashes = 0
+        self._busy_time = 0.0
+        self._in_flight = 0
+        self._busy = set()
+        self._generation = 0  # bumped by interrupt(), interrupted queries are not retried
+        self._check_protocol()
+
+    def _check_protocol(self):
+        """
+        Fail fast on a c4solver built before it answered every line
+        """
+        try:
+            self._workers[0].query(PROBE, PROBE_TIMEOUT)
+        except SolverError as e:
+            self.close()
+            raise SolverError(f"{self.executable} does not answer invalid positions ({e}), "
+                              f"rebuild it from connect4_engine/core/connect4ai") from e
+
+    def query(self, line: str, timeout: Optional[float] = None) -> str:
+        """
+        Solve one position (pons string) on a free worker.
+        timeout covers waiting for a worker and the search, defaults to the pool's timeout.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise SolverTimeout(f"No free solver within {timeout:.3f}s")
+
+        start = time.monotonic()
+        with self._lock:
+            self._in_flight += 1
+            self._busy.add(worker)
+            generation = self._generation
+        try:
+            for attempt in range(2):
+                if not worker.alive():
+                    self._respawn(worker, crashed=True)
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+                try:
+                    return worker.query(line, remaining)
+                except SolverTimeout:
+                    logger.warning(f"Solver timed out on '{line}', restarting it")
+                    self._respawn(worker, crashed=False)
+                    raise
+                except SolverError:
+                    if generation != self._generation:
+                        raise SolverError(f"Query '{line}' was interrupted")
+                    logger.warning(f"Solver crashed on '{line}', restarting it")
+                    self._respawn(worker, crashed=True)
+                    if attempt == 1:
+                        raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._busy.discard(worker)
+                self._queries += 1
+                self._busy_time += time.monotonic() - start
+            self._idle.put(worker)
+
+    def interrupt(self):
+        """
+        Abort the queries in flight by restarting their workers, e.g. superseded pondering.
+        the callers get a SolverError.
+        """
+        with self._lock:
+            self._generation += 1
+            busy = list(self._busy)
+        for worker in busy:
+            worker.restart()
+
+    def _respawn(self, worker: SolverProcess, crashed: bool):
+        with self._lock:
+            if crashed:
+                self._crashes += 1
+            else:
+                self._timeouts += 1
+        worker.restart()
+
+    def analyze(self, board, timeout: Optional[float] = None) -> Tuple[int, Optional[List[int]]]:
+        """
+        (best column, scores of every column) for the board, see parse_analysis.
+        the pool must run the solver in analyze mode.
+        """
+        out = self.query(board.pons_string, timeout)
+        if not out:
+            raise SolverError(f"Solver rejected position '{board.pons_string}'")
+        return parse_analysis(out)
+
+    def choose_move(self, board, timeout: Optional[float] = None) -> int:
+        """
+        Best column for the board, the pool must run the solver in analyze mode
+        """
+        return self.analyze(board, timeout)[0]
+
+    def stats(self) -> dict:
+        """
+        Utilization counters of the pool
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._created
+            return {
+                "size": self.size,
+                "in_flight": self._in_flight,
+                "queries": self._queries,
+                "timeouts": self._timeouts,
+                "crashes": self._crashes,
+                "restarts": sum(worker.restarts for worker in self._workers),
+                "busy_time": self._busy_time,
+                "utilization": self._busy_time / (self.size * elapsed) if elapsed > 0 else 0.0,
+                "mean_latency": self._busy_time / self._queries if self._queries else 0.0,
+            }
+
+    def close(self):
+        for worker in self._workers:
+            worker.close()
@@ -0,0 +1,195 @@
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from core.board import Board, BoardGeometry
+from core.solver_binding import INVALID_MOVE
+from utils.logger import logger
+
+DEFAULT_TABLEBASE = "connect4_engine/core/7x6.tablebase"
+
+# magic, width, height, max empty cells, entry count; then the sorted uint64 keys and the int8 scores
+HEADER = struct.Struct("<4sBBBxQ")
+MAGIC = b"C4TB"
+
+
+def mirror_key(key: int, geometry: BoardGeometry) -> int:
+    """
+    Key of the left-right mirror image. position + mask never carries from one
+    column to the next, so the key can be mirrored column by column.
+    """
+    column = (1 << geometry.stride) - 1
+    mirrored = 0
+    for col in range(geometry.width):
+        bits = (key >> (col * geometry.stride)) & column
+        mirrored |= bits << ((geometry.width - 1 - col) * geometry.stride)
+    return mirrored
+
+
+def tablebase_key(key: int, geometry: BoardGeometry) -> int:
+    """
+    Board.key() folded by symmetry, a position and its mirror image share an entry
+    """
+    return min(key, mirror_key(key, geometry))
+
+
+def solve_endgame(board: Board, scores: Dict[int, int]) -> int:
+    """
+    Exact score of the position for the player to move (same scale as c4solver), by full
+    minimax of the remaining moves. every position reachable goes into scores under its
+    tablebase key, so only positions with few empty cells are affordable.
+    """
+    g = board.geometry
+    cells = g.width * g.height
+    columns = [g.column_bits << (col * g.stride) for col in range(g.width)]
+
+    def has_alignment(bits: int) -> bool:
+        for shifts in g.alignment_shifts:
+            m = bits
+            for shift in shifts:
+                m &= m >> shift
+            if m:
+                return True
+        return False
+
+    def negamax(position: int, mask: int, moves: int) -> int:
+        key = tablebase_key(position + mask, g)
+        score = scores.get(key)
+        if score is not None:
+            return score
+        possible = (mask + g.bottom_mask) & g.board_mask
+        moves_left = [possible & column for column in columns if possible & column]
+        score = 0 if not moves_left else -cells
+        for move in moves_left:
+            if has_alignment(position | move):
+                score = max(score, (cells + 1 - moves) // 2)
+            else:
+                # searched even next to a winning move: analyze() needs every reply
+                score = max(score, -negamax(position ^ mask, mask | move, moves + 1))
+        scores[key] = score
+        return score
+
+    return negamax(board.player_bits(board.to_move), board.mask, board.moves)
+
+
+def build_tablebase(lines: Iterable[str], max_empty: int, width: int = 7, height: int = 6) -> Dict[int, int]:
+    """
+    {key: score} of every position with at most max_empty empty cells that can follow
+    the given games (move strings): each game is cut at max_empty + 1 empty cells, where
+    the tablebase starts answering, and everything reachable from there is solved.
+    """
+    scores = {}
+    cells = width * height
+    for line in lines:
+        board = Board(width, height)
+        for move in line[:cells - max_empty - 1]:
+            board.play(int(move) - 1)
+            if board.done:
+                break
+        if not board.done and board.moves == cells - max_empty - 1:
+            solve_endgame(board, scores)
+    return scores
+
+
+def save_tablebase(path: str, scores: Dict[int, int], max_empty: int, width: int = 7, height: int = 6):
+    """
+    Write {key: score} sorted by key, for binary search
+    """
+    keys = np.array(sorted(scores), dtype="<u8")
+    values = np.array([scores[int(key)] for key in keys], dtype=np.int8)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, width, height, max_empty, len(keys)))
+        f.write(keys.tobytes())
+        f.write(values.tobytes())
+
+
+class Tablebase:
+    """
+    Read only, memory mapped table of exact scores of late positions, looked up by
+    binary search on the sorted keys. hits / misses count the analyze() calls it could /
+    could not answer.
+    """
+
+    def __init__(self, path: str = DEFAULT_TABLEBASE, width: int = 7, height: int = 6):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, file_width, file_height, self.max_empty, self.count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise Exception(f"{path} is not a tablebase file.")
+        if (file_width, file_height) != (width, height):
+            raise Exception(f"Tablebase {path} is for {file_width}x{file_height} boards, not {width}x{height}.")
+        if len(self._mmap) < HEADER.size + 9 * self.count:
+            raise Exception(f"Tablebase {path} is truncated.")
+        self.width, self.height = width, height
+        self.geometry = BoardGeometry.get(width, height, 4)
+        self._keys = np.frombuffer(self._mmap, dtype="<u8", count=self.count, offset=HEADER.size)
+        self._scores = np.frombuffer(self._mmap, dtype=np.int8, count=self.count, offset=HEADER.size + 8 * self.count)
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, key: int) -> Optional[int]:
+        """
+        Score stored for a tablebase key, None if it is not in the table
+        """
+        i = int(np.searchsorted(self._keys, key))
+        if i < self.count and self._keys[i] == key:
+            return int(self._scores[i])
+        return None
+
+    def get(self, board: Board) -> Optional[int]:
+        """
+        Score of the position for the player to move, None when it is not in the table
+        """
+        if board.width * board.height - board.moves > self.max_empty:
+            return None
+        return self.get_key(tablebase_key(board.key(), self.geometry))
+
+    def analyze(self, board: Board) -> Optional[List[int]]:
+        """
+        Score of every column like Solver::analyze, INVALID_MOVE for full columns.
+        None unless every reply is in the table.
+        """
+        cells = self.width * self.height
+        if cells - board.moves > self.max_empty + 1 or board.done:
+            return None
+        g = self.geometry
+        position, mask = board.player_bits(board.to_move), board.mask
+        scores = [INVALID_MOVE] * self.width
+        for col in board.available_actions():
+            move = 1 << (col * g.stride + board.heights[col])
+            if board._is_winning_move(position | move, move):
+                scores[col] = (cells + 1 - board.moves) // 2
+                continue
+            # the child position seen from the opponent: their stones, and the new mask
+            score = self.get_key(tablebase_key((position ^ mask) + (mask | move), g))
+            if score is None:
+                self.misses += 1
+                return None
+            scores[col] = -score
+        self.hits += 1
+        return scores
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self):
+        del self._keys, self._scores
+        self._mmap.close()
+
+
+def load_tablebase(path: str = DEFAULT_TABLEBASE, width: int = 7, height: int = 6) -> Optional[Tablebase]:
+    """
+    Tablebase if the file exists and is valid, None otherwise
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return Tablebase(path, width, height)
+    except Exception as e:
+        logger.warning(f"Could not load tablebase {path}: {e}")
+        return None
@@ -1,9 +1,16 @@
-from typing import Callable
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 from core.board import Board
-from core.ai import AIPlayerDummy, AIPascalPons
+from core.journal import AI, PLAYER, GameJournal
+from core.ai import AIPlayerDummy, AIPascalPons, make_ai, make_ponder_ai
+from core.move_cache import MoveCache
+from core.ponder import Ponderer
 from hardware.robot import IRobot
 from hardware.arduino import IArduino
 from utils.logger import logger
+from utils.tracing import tracer
+from utils.config import load_config
 class Connect4Game:
 
     PLAYER_COLOR = Board.P_RED
@@ -11,9 +18,18 @@ class Connect4Game:
     def __init__(self,
                  arduino: IArduino,
                  robot: IRobot,
-                 player_starts: bool = False):
+                 player_starts: bool = False,
+                 ai=None,
+                 journal: Optional[GameJournal] = None):
         self.board = Board()
-        self.ai = AIPascalPons(ai_executable_path="connect4_engine/core/c4solver.exe")
+        # moves and game boundaries are journaled to resume a game after a crash, see resume()
+        self.journal = journal
+        ai_config = load_config("ai")
+        # an ai passed in (e.g. by tools/selfplay.py) plays as is: no cache, no pondering
+        self.ai = ai
+        self.ponderer = None
+        if ai is None:
+            self._setup_ai(ai_config)
         self.robot = robot
         self.logger = logger
         self.arduino = arduino
@@ -22,23 +38,82 @@ class Connect4Game:
         self.turns_taken = {'player': 0, 'ai': 0}
         self.player_starts = player_starts
         self.turn = 'ai'
+        # the arm fetches the AI's puck on this thread while the AI is thinking
+        self._robot_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="robot")
+        # seconds spent by the last AI turn: total, choosing the move, fetching the puck
+        self.last_turn_times = {}
+        # (moves, winner color or None for a draw) of the last finished game
+        self.last_result = None
         # possibly setup robot and arduino if not done elsewhere
 
+    def _setup_ai(self, ai_config: dict):
+        cache = None
+        if ai_config.get("cache_path"):
+            cache = MoveCache(ai_config["cache_path"], capacity=ai_config.get("cache_size", 100_000))
+        # the built-in negamax AI takes over when c4solver can't run on this machine
+        budget = ai_config.get("fallback_budget", 2.0)
+        self.ai = make_ai(budget, cache=cache, turn_budget=ai_config.get("turn_budget"))
+        # pondering gets its own solver so it never holds up the AI's turn
+        if ai_config.get("ponder"):
+            ponder_budget = ai_config.get("ponder_budget", 60.0)
+            ponder_ai = make_ponder_ai(ponder_budget, budget, cache=cache)
+            self.ponderer = Ponderer(ponder_ai, Connect4Game.PLAYER_COLOR, time_budget=ponder_budget)
+
     def game_start(self):
         # initial turn
         self.logger.info("Game started!")
+        if self.journal is not None:
+            self.journal.game_started(self.player_starts, self.turns_taken['player'], self.turns_taken['ai'])
         if self.player_starts:
             self.turn = 'player'
+            self.ponder()
             self.robot.give_player_puck(self.turns_taken['player'])
         else:
             self.turn = 'ai'
             self.ai_turn()
 
+    def resume(self) -> bool:
+        """
+        Restore the game the journal was in the middle of when the controller stopped:
+        board, puck numbers and turn. the AI plays if it was its turn, otherwise the game
+        waits for the player's puck. False when there is no game to resume.
+        """
+        live = self.journal.live if self.journal is not None else None
+        if live is None:
+            return False
+        self.board.reset()
+        # the puck numbers carry on from the games before, for the sides that didn't move yet too
+        self.turns_taken = {'player': live.pucks[0], 'ai': live.pucks[1]}
+        self.player_starts = live.player_starts
+        for side, column, puck_no in live.moves:
+            turn, color = ('player', Connect4Game.PLAYER_COLOR) if side == PLAYER else ('ai', Connect4Game.AI_COLOR)
+            self.board.drop_piece(column, color, quiet=True)
+            self.turns_taken[turn] = puck_no + 1
+        if live.moves:
+            self.turn = 'player' if live.moves[-1][0] == AI else 'ai'
+        else:
+            self.turn = 'player' if live.player_starts else 'ai'
+        self.logger.info(f"Resuming game '{self.board.pons_string}' from the journal, {self.turn}'s turn")
+        self.board.display()
+        self.arduino.resume()
+        if self.turn == 'ai':
+            self.ai_turn()
+        else:
+            self.ponder()
+        return True
+
     def game_over(self, message: str):
         """
         Handle game over scenario
         """
         self.logger.info(message)
+        # one line per game for tools/review_games.py
+        self.logger.info(f"Game record: {self.board.pons_string}")
+        self.last_result = (self.board.pons_string, self.board.winner)
+        if self.journal is not None:
+            self.journal.game_ended(self.board.winner)
+        if self.ponderer is not None:
+            self.ponderer.cancel()
         self.board.display()
         self.arduino.reset()
         self.robot.reset()
@@ -54,36 +129,81 @@ class Connect4Game:
         if self.turn == 'ai':
             self.logger.error("board isn't supposed to see ai moves bc they fall under the ledstrip!")
         else: # player's turn, i.e. self.turn == 'player'
-            self.board.drop_piece(column, Connect4Game.PLAYER_COLOR)
-            self.logger.info(f"Player dropped piece in column {column}")
-            if self.check_winner():
-                return
+            with tracer.span("game.player_move"):
+                self.board.drop_piece(column, Connect4Game.PLAYER_COLOR)
+                self.logger.info(f"Player dropped piece in column {column}")
+                if self.journal is not None:
+                    self.journal.move(PLAYER, column, self.turns_taken['player'] - 1)
+                if self.check_winner():
+                    return
             self.turn = 'ai'
             self.ai_turn()
 
     def check_winner(self):
         """
-        unoptimized winner check after each move. checks for both players.
+        check the result the board computed when the last piece was dropped.
         """
-        if self.board.is_player_winner(Connect4Game.PLAYER_COLOR):
+        if not self.board.done:
+            return False
+        if self.board.winner == Connect4Game.PLAYER_COLOR:
             self.game_over("Player wins!")
-            return True
-        if self.board.is_player_winner(Connect4Game.AI_COLOR):
+        elif self.board.winner == Connect4Game.AI_COLOR:
             self.game_over("AI wins!")
-            return True
-        elif self.board.is_draw():
+        else:
             self.game_over("It's a draw!")
-            return True
-        return False
+        return True
     
+    def ponder(self):
+        """
+        start solving the AI's replies while the player is thinking
+        """
+        if self.ponderer is not None:
+            self.ponderer.start(self.board)
+
+    def choose_ai_move(self) -> int:
+        """
+        use the pondered reply if the player's move was solved already, otherwise ask the AI
+        """
+        if self.ponderer is not None:
+            ai_column = self.ponderer.take(self.board)
+            if ai_column is not None:
+                self.logger.info(f"Using pondered reply {ai_column}")
+                return ai_column
+        return self.ai.choose_move(self.board)
+
     def ai_turn(self):
-        # AI's turn 
-        ai_column = self.ai.choose_move(self.board)
-        self.robot.drop_piece(ai_column, self.turns_taken['ai'])
+        # AI's turn: the puck pickup doesn't depend on the column, so it runs while the AI thinks.
+        # the arm then waits at the column and goes straight to the player's puck from there.
+        start = time.monotonic()
+        puck_no = self.turns_taken['ai']
+        pickup = self._robot_thread.submit(self._timed, self.robot.pick_up_ai_puck, puck_no)
+        ai_column, solve_time = self._timed(self.choose_ai_move)
+        with tracer.span("game.pickup_wait"):
+            _, pickup_time = pickup.result()
+        with tracer.span("game.place_puck"):
+            self.robot.place_puck(ai_column, puck_no)
         self.turns_taken['ai'] += 1
+        self.last_turn_times = {"turn": time.monotonic() - start, "solve": solve_time, "pickup": pickup_time}
+        for stage, seconds in self.last_turn_times.items():
+            tracer.record(f"game.ai_{stage}", seconds)
+        self.logger.info(f"AI turn took {self.last_turn_times['turn']:.2f}s "
+                         f"(solving {solve_time:.2f}s, puck pickup {pickup_time:.2f}s)")
         self.board.drop_piece(ai_column, Connect4Game.AI_COLOR) # ledstrip doesn't detect ai piece drop bc it falls under it.
         self.logger.info(f"AI dropped piece in column {ai_column}")
+        if self.journal is not None:
+            self.journal.move(AI, ai_column, puck_no)
         if self.check_winner():
             return
         self.turn = 'player'
-        self.robot.give_player_puck(self.turns_taken['player'])
\ No newline at end of file
+        self.ponder()
+        with tracer.span("game.give_player_puck"):
+            self.robot.give_player_puck(self.turns_taken['player'])
+
+    @staticmethod
+    def _timed(fn, *args):
+        """
+        (fn(*args), seconds it took)
+        """
+        start = time.monotonic()
+        result = fn(*args)
+        return result, time.monotonic() - start
@@ -1,7 +1,11 @@
-from typing import Callable
+import queue
+import threading
+import time
+from typing import Callable, NamedTuple, Optional, Union
 
 from abc import ABC, abstractmethod
 from utils.logger import logger
+from utils.tracing import tracer
 import serial
 
 class IArduino(ABC):
@@ -18,11 +22,72 @@ class IArduino(ABC):
     def reset(self):
         pass
 
+    def resume(self):
+        """
+        Accept the player's pucks of a game resumed from the journal, without a START
+        """
+
+class Start(NamedTuple):
+    received: float  # time.monotonic() when the line was read
+
+
+class Drop(NamedTuple):
+    column: int
+    received: float
+
+
+class Log(NamedTuple):
+    text: str
+    received: float
+
+
+ArduinoEvent = Union[Start, Drop, Log]
+
+
+def parse_line(line: str, received: float) -> Optional[ArduinoEvent]:
+    """
+    Event of one serial line (docs/serial_protocol.md), None for lines that aren't one
+    """
+    parts = line.split()
+    if not parts:
+        return None
+    if parts[0] == "START":
+        return Start(received)
+    if parts[0] == "DROP" and len(parts) == 2:
+        try:
+            return Drop(int(parts[1]), received)
+        except ValueError:
+            logger.warning(f"Invalid column in line: {line}")
+            return None
+    if parts[0] == "LOG":
+        return Log(" ".join(parts[1:]), received)
+    return None
+
+
 class ArduinoCommunicator(IArduino):
-    def __init__(self, ser):
+    """
+    A reader thread turns serial lines into events on a bounded queue, the game's
+    callbacks run on whichever thread consumes the queue (dispatch_loop), so serial
+    reads go on during the AI's turn and the robot's moves.
+
+    when the queue is full, LOG events are dropped (and counted), START / DROP wait
+    for room: the reader stops reading and the lines wait in the serial buffer.
+    """
+    # seconds to wait after an empty read that returned at once, instead of spinning
+    IDLE_WAIT = 0.01
+
+    def __init__(self, ser, queue_size: int = 64):
         self._ser = ser
         self._logger = logger
         self._accept_moves = False          # only accept drops when game is active
+        self._events = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._reader: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._received = 0
+        self._dropped = {"Start": 0, "Drop": 0, "Log": 0}
+        self._blocked_time = 0.0
+        self._high_water = 0
 
     def set_on_puck_dropped_callback(self, callback: Callable[[int], None]):
         self._on_puck_dropped = callback
@@ -30,40 +95,135 @@ class ArduinoCommunicator(IArduino):
     def set_game_start_callback(self, callback: Callable[[], None]):
         self.game_start = callback
 
+    def start(self):
+        """
+        Start the reader thread
+        """
+        if self._reader is None or not self._reader.is_alive():
+            self._stop.clear()
+            self._reader = threading.Thread(target=self._read_serial, name="arduino-reader", daemon=True)
+            self._reader.start()
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        """
+        Stop reading and dispatching, a reader blocked in readline() is left to the port's timeout
+        """
+        self._stop.set()
+        if self._reader is not None:
+            self._reader.join(timeout)
+
     def read_loop(self):
+        """
+        Read the serial port on the reader thread and run the game's callbacks on this one
+        """
         self._logger.info("Arduino read loop started")
-        while True:
+        self.start()
+        self.dispatch_loop()
+
+    def _read_serial(self):
+        while not self._stop.is_set():
+            start = time.monotonic()
             line = self._ser.readline().decode("utf-8", errors="ignore").strip()
             if not line:
+                # a port with a short (or no) timeout returns at once, don't spin on it
+                if time.monotonic() - start < self.IDLE_WAIT:
+                    self._stop.wait(self.IDLE_WAIT)
                 continue
             self._logger.debug(f"Serial line: {line}")
-            self._handle_line(line)
+            event = parse_line(line, time.monotonic())
+            if event is not None:
+                self._enqueue(event)
+
+    def _enqueue(self, event: ArduinoEvent):
+        with self._stats_lock:
+            self._received += 1
+        if isinstance(event, Log):
+            try:
+                self._events.put_nowait(event)
+            except queue.Full:
+                with self._stats_lock:
+                    self._dropped["Log"] += 1
+                return
+        else:
+            blocked = None
+            queued = False
+            while not queued and not self._stop.is_set():
+                try:
+                    self._events.put(event, timeout=0.1)
+                    queued = True
+                except queue.Full:
+                    if blocked is None:
+                        blocked = time.monotonic()
+                        self._logger.warning("Arduino event queue full, holding back serial reads")
+            with self._stats_lock:
+                if blocked is not None:
+                    self._blocked_time += time.monotonic() - blocked
+                if not queued:  # stopped while waiting for room
+                    self._dropped[type(event).__name__] += 1
+        with self._stats_lock:
+            self._high_water = max(self._high_water, self._events.qsize())
+
+    def dispatch(self, timeout: Optional[float] = None) -> bool:
+        """
+        Handle the next event, False if there was none within timeout
+        """
+        try:
+            event = self._events.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        tracer.record("arduino.queue_wait", time.monotonic() - event.received)
+        self._handle_event(event)
+        return True
+
+    def dispatch_loop(self):
+        """
+        Handle events until stop()
+        """
+        while not self._stop.is_set():
+            self.dispatch(timeout=0.1)
 
     def _handle_line(self, line: str):
-        parts = line.split()
+        event = parse_line(line, time.monotonic())
+        if event is not None:
+            self._handle_event(event)
 
-        if parts[0] == "START":
+    def _handle_event(self, event: ArduinoEvent):
+        if isinstance(event, Start):
             self.handle_start()
+        elif isinstance(event, Drop) and self._accept_moves:
+            self.handle_drop(event.column)
+        elif isinstance(event, Log):
+            self._logger.info(f"Arduino log: {event.text}")
 
-        elif parts[0] == "DROP" and self._accept_moves and len(parts) == 2:
-            return self.handle_drop(line, parts)
-        elif parts[0] == "LOG":
-            self._logger.info(f"Arduino log: {' '.join(parts[1:])}")
-
-    def handle_drop(self, line, parts):
-        try:
-            col = int(parts[1])
-        except ValueError:
-            self._logger.warning(f"Invalid column in line: {line}")
-            return
+    def handle_drop(self, col: int):
         self._logger.info(f"Detected puck in column {col}")
-        self._on_puck_dropped(col)
+        # from the DROP event to the game being done with it (the AI's turn included)
+        with tracer.span("arduino.drop"):
+            self._on_puck_dropped(col)
 
     def handle_start(self):
         self._logger.info("Start signal from Arduino")
         self._accept_moves = True
         self.game_start()
 
+    def stats(self) -> dict:
+        """
+        Event queue counters: lines parsed into events, events dropped by kind,
+        seconds the reader waited for room, deepest the queue got
+        """
+        with self._stats_lock:
+            return {
+                "received": self._received,
+                "dropped": dict(self._dropped),
+                "blocked_time": self._blocked_time,
+                "queued": self._events.qsize(),
+                "high_water": self._high_water,
+            }
+
+    def resume(self):
+        self._logger.info("Resuming a game, accepting drops")
+        self._accept_moves = True
+
     def reset(self):
         msg = f"RESET\n"
         self._logger.info(f"Sending to Arduino: {msg.strip()}")
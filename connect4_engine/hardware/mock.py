@@ -103,3 +103,39 @@ class RobotDummySerial(IRobot):
         """
         logger.warning("Robot resetting to home position...")
 
+
+class ArduinoSim(IArduino):
+    """
+    Silent Arduino for simulations (tools/selfplay.py): no logging, no waiting.
+    drop() reports a player's puck, resets counts the games that ended.
+    """
+    def __init__(self):
+        self.on_puck_dropped_callback: Optional[Callable[[int], None]] = None
+        self.game_start: Optional[Callable[[], None]] = None
+        self.resets = 0
+
+    def set_on_puck_dropped_callback(self, callback: Callable[[int], None]):
+        self.on_puck_dropped_callback = callback
+
+    def set_game_start_callback(self, callback: Callable[[], None]):
+        self.game_start = callback
+
+    def drop(self, column: int):
+        return self.on_puck_dropped_callback(column)
+
+    def reset(self):
+        self.resets += 1
+
+
+class RobotSim(IRobot):
+    """
+    Silent robot for simulations, the AI's pucks are placed by the game itself
+    """
+    def drop_piece(self, column: int, puck_no: int):
+        pass
+
+    def give_player_puck(self, puck_no: int):
+        pass
+
+    def reset(self):
+        pass
@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 # from legacy.ArmInterface import ArmInterface
 from pymycobot import MyCobot280
 from utils.logger import logger
+from utils.tracing import tracer
 import time
 import json
 
@@ -19,6 +20,20 @@ class IRobot(ABC):
     def reset(self):
         pass
 
+    # drop_piece split in steps, so the game can pick the puck up while the AI is thinking.
+    # robots that can't split it drop the whole piece in place_puck.
+
+    def pick_up_ai_puck(self, puck_no: int):
+        """
+        Take the AI's next puck and hold it, the column isn't known yet
+        """
+
+    def place_puck(self, column: int, puck_no: int):
+        """
+        Drop the held puck in the column and stay there, the next move starts from the column
+        """
+        self.drop_piece(column, puck_no)
+
 class RobotCommunicator(IRobot):
     def __init__(self, com_port: str = "COM11"):
         self.robot = MyCobot280(com_port)
@@ -35,28 +50,44 @@ class RobotCommunicator(IRobot):
             self.angles = json.load(f)
 
     def drop_piece(self, column: int,  puck_no: int):
-        angles = self._get_puck_angle('red', puck_no)
-        logger.debug(f"Picking up red puck number {puck_no} at angles {angles}")
-        self.robot.sync_send_angles(angles, 50)
-        self._pump_on()
-        logger.debug(f"Moving to column {column} drop angles {self.angles[f'column_{column}']}")
-        self.robot.sync_send_angles(self.angles[f"column_{column}"], 50)
-        self._pump_off()
-        self.robot.sync_send_angles(self.angles["home"], 50)
+        self.pick_up_ai_puck(puck_no)
+        self.place_puck(column, puck_no)
+        self._move("home", self.angles["home"])
         logger.debug(f"Returned to home position")
+
+    def pick_up_ai_puck(self, puck_no: int):
+        with tracer.span("robot.pick_up_ai_puck"):
+            angles = self._get_puck_angle('red', puck_no)
+            logger.debug(f"Picking up red puck number {puck_no} at angles {angles}")
+            self._move("red_puck", angles)
+            self._pump_on()
+
+    def place_puck(self, column: int, puck_no: int):
+        with tracer.span("robot.place_puck"):
+            logger.debug(f"Moving to column {column} drop angles {self.angles[f'column_{column}']}")
+            self._move("column", self.angles[f"column_{column}"])
+            self._pump_off()
     
     def give_player_puck(self, puck_no: int):
-        logger.debug("Giving player a puck")
-        angles = self._get_puck_angle('yellow', puck_no)
-        logger.debug(f"Picking up yellow puck number {puck_no} at angles {angles}")
-        self.robot.sync_send_angles(angles, 50)
-        self._pump_on()
-        logger.debug("Puck picked up, moving to player position")
-        self.robot.sync_send_angles(self.angles["player_dropoff"], 50)
-        logger.debug("At player position, releasing puck")
-        self._pump_off()
-        self.robot.sync_send_angles(self.angles["home"], 50)
-        logger.debug("Returned to home position")
+        with tracer.span("robot.give_player_puck"):
+            logger.debug("Giving player a puck")
+            angles = self._get_puck_angle('yellow', puck_no)
+            logger.debug(f"Picking up yellow puck number {puck_no} at angles {angles}")
+            self._move("yellow_puck", angles)
+            self._pump_on()
+            logger.debug("Puck picked up, moving to player position")
+            self._move("player_dropoff", self.angles["player_dropoff"])
+            logger.debug("At player position, releasing puck")
+            self._pump_off()
+            self._move("home", self.angles["home"])
+            logger.debug("Returned to home position")
+
+    def _move(self, segment: str, angles):
+        """
+        sync_send_angles, timed as one segment of the arm's path
+        """
+        with tracer.span(f"robot.move.{segment}"):
+            self.robot.sync_send_angles(angles, 50)
 
     def _get_puck_angle(self, color: str, puck_no: int):
         """
@@ -64,7 +95,7 @@ class RobotCommunicator(IRobot):
         Get the angles for picking up a puck of a given color, given that it's the nth puck.
         """
         key = f"{color}_puck_width"
-        angles = self.angles[color]
+        angles = list(self.angles[color])  # a copy: the angles only depend on puck_no, e.g. after a resume
         angles[5] -= self.angles[key] * puck_no
         return angles
     
@@ -76,7 +107,8 @@ class RobotCommunicator(IRobot):
         # start pump
         self.robot.set_basic_output(self.pump_pin, 0)
         logger.debug(f"pump on")
-        time.sleep(self.VACCUM_BUILD_TIME)
+        with tracer.span("robot.pump_on"):
+            time.sleep(self.VACCUM_BUILD_TIME)
 
     # Method to turn off the pump
     def _pump_off(self):
@@ -86,10 +118,11 @@ class RobotCommunicator(IRobot):
         # Start the exhaust valve
         self.robot.set_basic_output(self.valve_pin, 0)
         logger.debug(f"exhaust open")
-        time.sleep(self.VACCUM_DROP_TIME)
+        with tracer.span("robot.pump_off"):
+            time.sleep(self.VACCUM_DROP_TIME)
 
     def reset(self):
-        self.robot.sync_send_angles(self.angles["home"], 50)
+        self._move("home", self.angles["home"])
         logger.debug("Robot reset to home position")
 
 if __name__ == "__main__":
@@ -5,6 +5,9 @@ from hardware.arduino import ArduinoCommunicator
 import serial
 from core.ai import AIPascalPons, main
 from core.board import Board
+from core.journal import GameJournal
+from utils.config import load_config
+from utils.tracing import tracer
 
 class Main:
     def __init__(self):
@@ -12,7 +15,15 @@ class Main:
         self.robot = RobotCommunicator("COM11")
         # self.arduino = ArduinoDummy()
         # self.robot = RobotDummy(arduino=self.arduino)
-        self.game = Connect4Game(arduino=self.arduino, robot=self.robot, player_starts=False)
+        tracer.configure(load_config("tracing"))
+        journal_config = load_config("journal")
+        self.journal = None
+        if journal_config.get("path"):
+            self.journal = GameJournal(journal_config["path"], journal_config.get("max_bytes", 1 << 20),
+                                       journal_config.get("keep", 1))
+        self.game = Connect4Game(arduino=self.arduino, robot=self.robot, player_starts=False, journal=self.journal)
+        # pick up the game the last run was in the middle of, if any
+        self.game.resume()
     
     def play(self):
         # self.game.game_start()
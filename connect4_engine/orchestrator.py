@@ -0,0 +1,209 @@
+"""
+Several tables run from one process.
+
+Every table has its own Arduino, robot and Connect4Game, the AIs of all the tables
+share one solver pool (one warm solver per table), the move cache, the opening book
+and the tablebase. Events are scheduled per table: what an Arduino reports runs on its
+table's own thread, so a slow arm only holds up its own table and never another
+table's AI. Pondering is off, it would compete with the other tables' turns for the
+shared solvers.
+
+Tables are listed in config.yaml under tables, run from the repo root:
+    PYTHONPATH=connect4_engine python connect4_engine/orchestrator.py
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+import serial
+
+from core.ai import AINegamax, AIPascalPons
+from core.journal import GameJournal
+from core.move_cache import MoveCache
+from core.opening_book import load_book
+from core.solver_pool import SolverError, SolverPool, default_solver_path
+from core.tablebase import load_tablebase
+from game import Connect4Game
+from hardware.arduino import ArduinoCommunicator, IArduino
+from hardware.robot import IRobot, RobotCommunicator
+from utils.config import load_config
+from utils.logger import logger
+from utils.tracing import tracer
+
+
+class Table:
+    """
+    One game session: its hardware, its game, and the thread its events run on
+    """
+
+    def __init__(self, name: str, arduino: IArduino, robot: IRobot, ai, player_starts: bool = False,
+                 history: int = 1000, journal: Optional[GameJournal] = None):
+        self.name = name
+        self.arduino = arduino
+        self.robot = robot
+        self.journal = journal
+        self.game = Connect4Game(arduino, robot, player_starts, ai=ai, journal=journal)
+        self._events = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"table-{name}")
+        # the Arduino's callbacks only queue the game's work, its reader never waits for the arm
+        arduino.set_on_puck_dropped_callback(lambda column: self.post(self.game.piece_dropped_in_board, column))
+        arduino.set_game_start_callback(lambda: self.post(self.game.game_start))
+        # last_turn_times of the latest AI turns
+        self.turn_times = deque(maxlen=history)
+        self._last_turn = None
+
+    def post(self, fn, *args) -> Future:
+        """
+        Run a game event on the table's thread, after the events before it
+        """
+        return self._events.submit(self._run, fn, *args)
+
+    def _run(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception:
+            logger.exception(f"Table {self.name}: {fn.__name__} failed")
+        times = self.game.last_turn_times
+        if times and times is not self._last_turn:
+            self._last_turn = times
+            self.turn_times.append(times)
+
+    def stats(self) -> dict:
+        """
+        Turn latency of the latest AI turns, in seconds
+        """
+        result = {"turns": len(self.turn_times)}
+        for part in ("turn", "solve", "pickup"):
+            values = np.array([times[part] for times in self.turn_times])
+            result[part] = {
+                "mean": float(values.mean()) if len(values) else None,
+                "p50": float(np.percentile(values, 50)) if len(values) else None,
+                "p95": float(np.percentile(values, 95)) if len(values) else None,
+                "max": float(values.max()) if len(values) else None,
+            }
+        return result
+
+    def close(self):
+        self._events.shutdown(wait=True)
+        if self.journal is not None:
+            self.journal.close()
+
+
+class Orchestrator:
+    """
+    Hosts the tables and the solver backend they share
+    """
+
+    def __init__(self, tables: int, ai_config: Optional[dict] = None, executable: Optional[str] = None):
+        ai_config = load_config("ai") if ai_config is None else ai_config
+        self.cache = None
+        if ai_config.get("cache_path"):
+            self.cache = MoveCache(ai_config["cache_path"], capacity=ai_config.get("cache_size", 100_000))
+        self.turn_budget = ai_config.get("turn_budget")
+        self.fallback_budget = ai_config.get("fallback_budget", 2.0)
+        self.opening_book = load_book()
+        self.tablebase = load_tablebase()
+        # one solver per table: every table that asks gets one right away
+        self.pool = None
+        self.weak_pool = None
+        try:
+            self.pool = SolverPool(executable or default_solver_path(), size=tables)
+            if self.turn_budget is not None:
+                self.weak_pool = SolverPool(self.pool.executable, self.pool.book, size=tables, weak=True)
+        except (OSError, SolverError) as e:
+            logger.warning(f"c4solver unavailable ({e}), the tables fall back to the negamax AI")
+        self.tables: List[Table] = []
+        self._readers: List[threading.Thread] = []
+
+    def make_ai(self):
+        """
+        AI of one table, on the shared solvers
+        """
+        if self.pool is None:
+            return AINegamax(time_budget=self.fallback_budget)
+        return AIPascalPons(pool=self.pool, cache=self.cache, turn_budget=self.turn_budget,
+                            opening_book=self.opening_book, tablebase=self.tablebase, weak_pool=self.weak_pool)
+
+    def add_table(self, name: str, arduino: IArduino, robot: IRobot, player_starts: bool = False, ai=None,
+                  journal: Optional[GameJournal] = None) -> Table:
+        table = Table(name, arduino, robot, ai or self.make_ai(), player_starts, journal=journal)
+        self.tables.append(table)
+        return table
+
+    def start(self):
+        """
+        Resume the journaled games, then read every Arduino that has a serial read loop on its own thread
+        """
+        for table in self.tables:
+            table.post(table.game.resume)
+            read_loop = getattr(table.arduino, "read_loop", None)
+            if read_loop is not None:
+                thread = threading.Thread(target=read_loop, name=f"arduino-{table.name}", daemon=True)
+                thread.start()
+                self._readers.append(thread)
+
+    def stats(self) -> dict:
+        result = {"tables": {table.name: table.stats() for table in self.tables}}
+        if self.pool is not None:
+            result["pool"] = self.pool.stats()
+        if self.cache is not None:
+            result["cache"] = self.cache.stats()
+        return result
+
+    def report(self):
+        for name, stats in self.stats()["tables"].items():
+            turn, solve = stats["turn"], stats["solve"]
+            if stats["turns"]:
+                logger.info(f"Table {name}: {stats['turns']} AI turns, turn p50 {turn['p50']:.2f}s "
+                            f"p95 {turn['p95']:.2f}s max {turn['max']:.2f}s, solving p95 {solve['p95']:.2f}s")
+        if self.pool is not None:
+            pool = self.pool.stats()
+            logger.info(f"Solver pool: {pool['queries']} queries, {pool['utilization']:.0%} busy")
+
+    def run(self, report_every: float = 60.0):
+        """
+        Play until interrupted, logging the tables' turn latency every report_every seconds
+        """
+        self.start()
+        try:
+            while True:
+                time.sleep(report_every)
+                self.report()
+        finally:
+            self.report()
+
+    def close(self):
+        for table in self.tables:
+            stop = getattr(table.arduino, "stop", None)
+            if stop is not None:
+                stop()
+            table.close()
+        for pool in (self.pool, self.weak_pool):
+            if pool is not None:
+                pool.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def main():
+    tracer.configure(load_config("tracing"))
+    tables = load_config("tables")
+    if not tables:
+        raise Exception("No tables in config.yaml")
+    orchestrator = Orchestrator(len(tables))
+    for i, table in enumerate(tables):
+        arduino = ArduinoCommunicator(ser=serial.Serial(table["arduino"], 115200))
+        robot = RobotCommunicator(table["robot"])
+        journal = GameJournal(table["journal"]) if table.get("journal") else None
+        orchestrator.add_table(table.get("name", str(i + 1)), arduino, robot, table.get("player_starts", False),
+                               journal=journal)
+    try:
+        orchestrator.run()
+    finally:
+        orchestrator.close()
+
+
+if __name__ == "__main__":
+    main()
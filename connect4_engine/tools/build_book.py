@@ -0,0 +1,208 @@
+"""
+Build an opening book deeper than the shipped 7x6.book.
+
+Every position of at most --depth moves is enumerated once (mirror images share
+a key3), the positions are split in shards solved by a pool of worker processes,
+then the scores are merged into a book file OpeningBook::load accepts.
+Solved shards are kept in --work-dir, a run that was interrupted resumes from them.
+
+Run from the repo root:
+    PYTHONPATH=connect4_engine python -m tools.build_book --depth 12 --workers 8 --out 7x6-12.book
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from core.board import Board
+from core.opening_book import save_book
+from core.solver_binding import load_binding
+from core.solver_pool import DEFAULT_BOOK, SolverError, SolverProcess, default_solver_path, solver_command
+from utils.logger import logger
+
+
+def enumerate_positions(depth: int, width: int = 7, height: int = 6) -> List[str]:
+    """
+    Move strings of the distinct positions with at most depth moves, one per key3,
+    in depth first order. like connect4ai/generator.cpp, finished games are left out.
+    """
+    board = Board(width, height)
+    seen = set()
+    positions = []
+
+    def explore():
+        key = board.canonical_key()
+        if key in seen:
+            return
+        seen.add(key)
+        positions.append(board.pons_string)
+        if board.moves >= depth:
+            return
+        for col in board.available_actions():
+            board.play(col)
+            if not board.done:
+                explore()
+            board.undo()
+
+    explore()
+    return positions
+
+
+def book_key_bytes(depth: int, log_size: int, width: int = 7) -> int:
+    """
+    Smallest partial key the book needs, the bits of key3 not implied by its slot
+    (same computation as generator.cpp)
+    """
+    bits = int((depth + width - 1) * math.log2(3)) + 1 - log_size
+    for key_bytes in (1, 2, 4):
+        if bits <= 8 * key_bytes:
+            return key_bytes
+    raise Exception(f"A depth {depth} book needs more than 2^{log_size} entries.")
+
+
+def book_log_size(count: int) -> int:
+    """
+    log2 of the table size for count positions, about two slots per position to keep
+    collisions rare, within the 21..27 sizes the solver can load
+    """
+    return min(max((2 * count - 1).bit_length(), 21), 27)
+
+
+# --- worker processes -----------------------------------------------------------
+
+_solver = None
+
+
+def _init_worker(executable: Optional[str], book: str):
+    """
+    One solver per worker process: the in-process library if built, else a c4solver subprocess
+    """
+    global _solver
+    binding = None if executable else load_binding(book=book)
+    if binding is not None:
+        _solver = binding.solve
+    else:
+        process = SolverProcess(solver_command(executable or default_solver_path(), book, analyze=False))
+
+        def solve(moves: str) -> int:
+            out = process.query(moves)
+            if not out:
+                raise SolverError(f"Solver rejected position '{moves}'")
+            return int(out)
+
+        _solver = solve
+
+
+def _solve_shard(shard_path: str, result_path: str) -> int:
+    """
+    Solve every position of a shard and write "moves score" lines (the input of
+    generator.cpp) to result_path, atomically so a killed run never leaves half a shard
+    """
+    with open(shard_path) as f:
+        positions = f.read().splitlines()  # the empty position is an empty line
+    lines = [f"{moves} {_solver(moves)}\n" for moves in positions]
+    tmp_path = result_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.writelines(lines)
+    os.replace(tmp_path, result_path)
+    return len(lines)
+
+
+# --- driver ---------------------------------------------------------------------
+
+def prepare_shards(work_dir: str, depth: int, shard_size: int) -> List[str]:
+    """
+    Enumerate the positions into shard files, or reuse the shards of a previous run
+    """
+    meta_path = os.path.join(work_dir, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta["depth"] != depth or meta["shard_size"] != shard_size:
+            raise Exception(f"{work_dir} holds a run with depth {meta['depth']} and shard size "
+                            f"{meta['shard_size']}, use another work dir.")
+        logger.info(f"Resuming {meta['shards']} shards ({meta['positions']} positions)")
+        return [os.path.join(work_dir, f"shard-{i:05d}.txt") for i in range(meta["shards"])]
+
+    os.makedirs(work_dir, exist_ok=True)
+    positions = enumerate_positions(depth)
+    shards = []
+    for i, start in enumerate(range(0, len(positions), shard_size)):
+        path = os.path.join(work_dir, f"shard-{i:05d}.txt")
+        with open(path, "w") as f:
+            f.write("\n".join(positions[start:start + shard_size]) + "\n")
+        shards.append(path)
+    # written last: its presence means the shards are complete
+    with open(meta_path, "w") as f:
+        json.dump({"depth": depth, "shard_size": shard_size, "shards": len(shards),
+                   "positions": len(positions)}, f)
+    logger.info(f"{len(positions)} positions up to depth {depth} in {len(shards)} shards")
+    return shards
+
+
+def solve_shards(shards: List[str], workers: int, executable: Optional[str], book: str) -> int:
+    """
+    Solve the shards without a result file, returns the number of positions solved
+    """
+    todo = [(shard, shard[:-len(".txt")] + ".scores") for shard in shards]
+    todo = [(shard, result) for shard, result in todo if not os.path.exists(result)]
+    logger.info(f"{len(shards) - len(todo)} shards already solved, {len(todo)} to go")
+    solved = 0
+    start = time.monotonic()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(executable, book)) as executor:
+        futures = [executor.submit(_solve_shard, shard, result) for shard, result in todo]
+        for done, future in enumerate(as_completed(futures), 1):
+            solved += future.result()
+            rate = solved / max(time.monotonic() - start, 1e-9)
+            logger.info(f"{done}/{len(todo)} shards, {solved} positions, {rate:.1f} positions/s")
+    return solved
+
+
+def merge_shards(shards: List[str], out: str, depth: int, log_size: Optional[int] = None) -> Dict[int, int]:
+    """
+    Read every shard's scores and write the book, returns {key3: score}
+    """
+    scores = {}
+    board = Board()
+    for shard in shards:
+        with open(shard[:-len(".txt")] + ".scores") as f:
+            for line in f:
+                moves, _, score = line.rstrip("\n").rpartition(" ")
+                board.reset()
+                for move in moves:
+                    board.play(int(move) - 1)
+                scores[board.canonical_key()] = int(score)
+    log_size = log_size or book_log_size(len(scores))
+    save_book(out, scores, depth, log_size, book_key_bytes(depth, log_size))
+    logger.info(f"Wrote {len(scores)} positions to {out} (2^{log_size} slots)")
+    return scores
+
+
+def build_book(depth: int, out: str, work_dir: str, workers: int = os.cpu_count() or 1,
+               shard_size: int = 1000, executable: Optional[str] = None,
+               seed_book: str = DEFAULT_BOOK, log_size: Optional[int] = None) -> Dict[int, int]:
+    shards = prepare_shards(work_dir, depth, shard_size)
+    solve_shards(shards, workers, executable, seed_book)
+    return merge_shards(shards, out, depth, log_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, required=True, help="deepest position stored, in moves")
+    parser.add_argument("--out", required=True, help="book file to write")
+    parser.add_argument("--work-dir", default="book-work", help="shards and checkpoints")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=1000, help="positions per shard")
+    parser.add_argument("--solver", help="c4solver binary, default the in-process library or the shipped binary")
+    parser.add_argument("--seed-book", default=DEFAULT_BOOK, help="book the solvers use to speed up the search")
+    parser.add_argument("--log-size", type=int, help="log2 of the book size, default from the position count")
+    args = parser.parse_args()
+    build_book(args.depth, args.out, args.work_dir, args.workers, args.shard_size,
+               args.solver, args.seed_book, args.log_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Build the late-game tablebase AIPascalPons reads before asking the solver.
+
+The positions come from games given in --lines (one move string per line, e.g. logged
+games) and/or --games sampled games. Each game is cut where --empty + 1 cells are left
+and every position that can follow is solved exactly.
+
+Run from the repo root:
+    PYTHONPATH=connect4_engine python -m tools.build_tablebase --empty 12 --games 2000
+"""
+import argparse
+import os
+import random
+import time
+from typing import List
+
+from core.board import Board
+from core.tablebase import DEFAULT_TABLEBASE, build_tablebase, save_tablebase
+from utils.logger import logger
+
+
+def sample_games(count: int, seed: int = 0) -> List[str]:
+    """
+    Move strings of games between two players who take a win, block the opponent's
+    win, and otherwise play at random with a preference for the center
+    """
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        board = Board()
+        while not board.done:
+            board.play(sample_move(board, rng))
+        games.append(board.pons_string)
+    return games
+
+
+def sample_move(board: Board, rng: random.Random) -> int:
+    """
+    Move of the sampled games' players in this position
+    """
+    actions = board.available_actions()
+    own = board.threats(board.to_move)
+    opponent = board.threats(Board.P_RED + Board.P_YELLOW - board.to_move)
+    playable = {col: 1 << (col * board.geometry.stride + board.heights[col]) for col in actions}
+    for threats in (own, opponent):
+        for col, move in playable.items():
+            if threats & move:
+                return col
+    weights = [board.width - abs(2 * col - (board.width - 1)) for col in actions]
+    return rng.choices(actions, weights)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--empty", type=int, default=12, help="most empty cells of a stored position")
+    parser.add_argument("--lines", help="file of games, one move string per line")
+    parser.add_argument("--games", type=int, default=0, help="games to sample on top of --lines")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=DEFAULT_TABLEBASE)
+    args = parser.parse_args()
+
+    games = sample_games(args.games, args.seed)
+    if args.lines:
+        with open(args.lines) as f:
+            games += [line.strip() for line in f if line.strip()]
+    start = time.monotonic()
+    scores = build_tablebase(games, args.empty)
+    save_tablebase(args.out, scores, args.empty)
+    logger.info(f"{len(scores)} positions from {len(games)} games in {time.monotonic() - start:.1f}s, "
+                f"{os.path.getsize(args.out) / 1e6:.1f} MB written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
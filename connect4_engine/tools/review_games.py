@@ -0,0 +1,261 @@
+"""
+Post-game review: the perfect score of every position of every game, and the score of
+the move that was played, so each move's cost is best - played.
+
+Games are read from text files holding a move string per line, or from game logs
+("Game record: ..." lines, or the dropped piece lines of older logs). They are streamed
+in batches: the positions of a batch are looked up in a bounded memo shared by all
+games (mirror images included), the missing ones are analyzed by a pool of solver
+processes, and the reviews are appended to a compact binary file, see read_reviews.
+
+Run from the repo root:
+    PYTHONPATH=connect4_engine python -m tools.review_games game.log games.txt --out reviews.bin
+    PYTHONPATH=connect4_engine python -m tools.review_games --dump reviews.bin
+"""
+import argparse
+import os
+import re
+import struct
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from core.board import Board
+from core.codec import pack_moves, unpack_moves
+from core.solver_binding import load_binding
+from core.solver_pool import DEFAULT_BOOK, SolverError, SolverProcess, default_solver_path, parse_analysis, solver_command
+from utils.logger import logger
+
+# per game: number of moves, the moves packed 3 bits each (codec.pack_moves), then
+# one int8 best score and one int8 played move score per move
+RECORD = struct.Struct("<B16s")
+
+_MOVES = re.compile(r"^[1-7]*$")
+_RECORD_LINE = re.compile(r"Game record: ([1-7]*)\s*$")
+_DROP_LINE = re.compile(r"(?:Player|AI) dropped piece in column (\d)")
+
+
+def read_games(paths: Iterable[str]) -> Iterator[str]:
+    """
+    Move strings of the games in the given files, one at a time.
+    a game's "Game record:" line is used when there is one, otherwise the game is
+    rebuilt from its dropped piece lines.
+    """
+    for path in paths:
+        with open(path) as f:
+            moves = None  # game being rebuilt from dropped piece lines
+            # rebuilt game that ended, yielded only if no "Game record:" line follows (older logs)
+            ended = None
+            for line in f:
+                line = line.strip()
+                if _MOVES.match(line):
+                    if ended is not None:
+                        yield ended
+                        ended = None
+                    if line:
+                        yield line
+                    continue
+                match = _RECORD_LINE.search(line)
+                if match:
+                    moves = ended = None
+                    yield match.group(1)
+                elif "Game started!" in line:
+                    if ended is not None:
+                        yield ended
+                        ended = None
+                    moves = ""
+                elif moves is not None:
+                    match = _DROP_LINE.search(line)
+                    if match:
+                        moves += str(int(match.group(1)) + 1)
+                    elif "wins!" in line or "draw!" in line:
+                        ended, moves = moves, None
+            if ended is not None:
+                yield ended
+
+
+def batches(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+# --- worker processes -----------------------------------------------------------
+
+_analyze = None
+
+
+def _init_worker(executable: Optional[str], book: str):
+    """
+    One solver per worker process: the in-process library if built, else a c4solver subprocess
+    """
+    global _analyze
+    binding = None if executable else load_binding(book=book)
+    if binding is not None:
+        _analyze = binding.analyze
+    else:
+        process = SolverProcess(solver_command(executable or default_solver_path(), book, analyze=True))
+
+        def analyze(moves: str) -> List[int]:
+            out = process.query(moves)
+            if not out:
+                raise SolverError(f"Solver rejected position '{moves}'")
+            scores = parse_analysis(out)[1]
+            if scores is None:
+                raise SolverError("The solver does not print every column's score (-s), rebuild it")
+            return scores
+
+        _analyze = analyze
+
+
+def _analyze_position(moves: str) -> Optional[List[int]]:
+    try:
+        return _analyze(moves)
+    except SolverError as e:
+        logger.warning(f"Could not analyze '{moves}': {e}")
+        return None
+
+
+# --- driver ---------------------------------------------------------------------
+
+class Reviewer:
+    """
+    Reviews games batch by batch, remembering the analysis of up to memo_size positions
+    """
+
+    def __init__(self, executor, memo_size: int = 1_000_000, chunksize: int = 64):
+        self.executor = executor
+        self.memo_size = memo_size
+        self.chunksize = chunksize
+        # canonical key -> scores of the canonical orientation
+        self._memo = OrderedDict()
+        self.games = 0
+        self.skipped = 0
+        self.positions = 0
+        self.analyzed = 0
+
+    @staticmethod
+    def _positions(game: str) -> Iterator[Tuple[int, bool, str]]:
+        """
+        (canonical key, mirrored, moves) of every position a move was played from
+        """
+        board = Board()
+        for i, move in enumerate(game):
+            key, mirrored = board.canonical()
+            yield key, mirrored, game[:i]
+            board.play(int(move) - 1)
+
+    def review_batch(self, games: List[str]) -> Iterator[Tuple[str, List[int], List[int]]]:
+        """
+        (game, best scores, played move scores) of every game of the batch that could be analyzed
+        """
+        positions = []
+        for game in games:
+            try:
+                positions.append(list(self._positions(game)))
+            except Exception as e:
+                logger.warning(f"Skipping game '{game}': {e}")
+                positions.append(None)
+        todo = {}
+        for game_positions in positions:
+            for key, mirrored, moves in game_positions or ():
+                if key not in self._memo and key not in todo:
+                    todo[key] = (moves, mirrored)
+        results = self.executor.map(_analyze_position, [moves for moves, _ in todo.values()],
+                                    chunksize=self.chunksize)
+        for (key, (_, mirrored)), scores in zip(todo.items(), results):
+            if scores is not None:
+                # kept in the canonical orientation
+                self._remember(key, scores[::-1] if mirrored else scores)
+        self.analyzed += len(todo)
+
+        for game, game_positions in zip(games, positions):
+            if game_positions is None:
+                self.skipped += 1
+                continue
+            best, played = [], []
+            for (key, mirrored, _), move in zip(game_positions, game):
+                scores = self._memo.get(key)
+                if scores is None:
+                    break
+                self._memo.move_to_end(key)
+                if mirrored:
+                    scores = scores[::-1]
+                best.append(max(scores))
+                played.append(scores[int(move) - 1])
+            else:
+                self.games += 1
+                self.positions += len(game)
+                yield game, best, played
+                continue
+            self.skipped += 1
+
+    def _remember(self, key: int, scores: List[int]):
+        self._memo[key] = scores
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+
+def write_review(f: BinaryIO, game: str, best: List[int], played: List[int]):
+    f.write(RECORD.pack(len(game), pack_moves(game)))
+    f.write(struct.pack(f"<{len(game)}b", *best))
+    f.write(struct.pack(f"<{len(game)}b", *played))
+
+
+def read_reviews(path: str) -> Iterator[Tuple[str, List[int], List[int]]]:
+    """
+    (game, best scores, played move scores) of every game of a review file
+    """
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(RECORD.size)
+            if not header:
+                return
+            moves, packed = RECORD.unpack(header)
+            game = "".join(str(col + 1) for col in unpack_moves(packed, moves))
+            scores = struct.unpack(f"<{2 * moves}b", f.read(2 * moves))
+            yield game, list(scores[:moves]), list(scores[moves:])
+
+
+def review_games(paths: List[str], out: str, workers: int = os.cpu_count() or 1, batch_size: int = 1000,
+                 memo_size: int = 1_000_000, executable: Optional[str] = None, book: str = DEFAULT_BOOK) -> Reviewer:
+    start = time.monotonic()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(executable, book)) as executor, \
+            open(out, "wb") as f:
+        reviewer = Reviewer(executor, memo_size)
+        for batch in batches(read_games(paths), batch_size):
+            for review in reviewer.review_batch(batch):
+                write_review(f, *review)
+            elapsed = time.monotonic() - start
+            logger.info(f"{reviewer.games} games, {reviewer.positions} positions, {reviewer.analyzed} analyzed "
+                        f"({reviewer.positions / max(elapsed, 1e-9):.0f} positions/s)")
+    return reviewer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("games", nargs="*", help="game logs or files of move strings")
+    parser.add_argument("--out", default="reviews.bin")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=1000, help="games read at a time")
+    parser.add_argument("--memo-size", type=int, default=1_000_000, help="analyzed positions kept in memory")
+    parser.add_argument("--solver", help="c4solver binary, default the in-process library or the shipped binary")
+    parser.add_argument("--book", default=DEFAULT_BOOK)
+    parser.add_argument("--dump", metavar="REVIEWS", help="print a review file instead")
+    args = parser.parse_args()
+
+    if args.dump:
+        for game, best, played in read_reviews(args.dump):
+            costs = " ".join(str(b - p) for b, p in zip(best, played))
+            print(f"{game} {costs}")
+        return
+    review_games(args.games, args.out, args.workers, args.batch_size, args.memo_size, args.solver, args.book)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Play thousands of full games between two engines through the real game flow.
+
+The AI engine plays as the Connect4Game's AI, the player engine drops the player's
+pucks through a silent simulated Arduino: no hardware, no sleeps, no logging. Games
+alternate who starts and are spread over a pool of worker processes, each keeping one
+game (and its engines) for all its games. The results are appended to a compact
+binary file, see read_results.
+
+Engines: random, greedy (takes a win, blocks a loss, else random towards the center),
+first (first free column), negamax[:seconds per move], solver[:seconds per move].
+
+Run from the repo root:
+    PYTHONPATH=connect4_engine python -m tools.selfplay --player greedy --ai negamax:0.05 --games 10000
+    PYTHONPATH=connect4_engine python -m tools.selfplay --dump selfplay.bin
+"""
+import argparse
+import logging
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, Optional, Tuple
+
+from core.ai import AINegamax, make_ai
+from core.board import Board
+from core.codec import pack_moves, unpack_moves
+from game import Connect4Game
+from hardware.mock import ArduinoSim, RobotSim
+from tools.build_tablebase import sample_move
+from utils.logger import logger
+from utils.tracing import tracer
+
+# per game: number of moves, the moves packed 3 bits each (codec.pack_moves),
+# the color that moved first and the winner's color (0 for a draw)
+RECORD = struct.Struct("<B16sBB")
+
+
+# --- engines --------------------------------------------------------------------
+
+class RandomEngine:
+    def __init__(self):
+        self.rng = random.Random()
+
+    def seed(self, seed: str):
+        self.rng.seed(seed)
+
+    def choose_move(self, board: Board) -> int:
+        return self.rng.choice(board.available_actions())
+
+
+class GreedyEngine(RandomEngine):
+    def choose_move(self, board: Board) -> int:
+        return sample_move(board, self.rng)
+
+
+class FirstEngine:
+    """
+    AIPlayerDummy without the thinking time
+    """
+    def choose_move(self, board: Board) -> int:
+        return board.available_actions()[0]
+
+
+def make_engine(spec: str):
+    """
+    Engine from its name and optional seconds per move, e.g. "negamax:0.05"
+    """
+    name, _, budget = spec.partition(":")
+    if name == "random":
+        return RandomEngine()
+    if name == "greedy":
+        return GreedyEngine()
+    if name == "first":
+        return FirstEngine()
+    if name == "negamax":
+        return AINegamax(time_budget=float(budget or 0.1))
+    if name == "solver":
+        return make_ai(float(budget or 2.0), turn_budget=float(budget) if budget else None)
+    raise ValueError(f"Unknown engine '{spec}'")
+
+
+# --- games ----------------------------------------------------------------------
+
+def play_game(game: Connect4Game, player, player_starts: bool) -> Tuple[str, Optional[int]]:
+    """
+    Play one game to the end, (moves, winner color or None for a draw)
+    """
+    arduino = game.arduino
+    ended = arduino.resets
+    game.player_starts = player_starts
+    # the simulated piles are full again for every game
+    game.turns_taken = {'player': 0, 'ai': 0}
+    game.game_start()
+    while arduino.resets == ended:
+        arduino.drop(player.choose_move(game.board))
+    return game.last_result
+
+
+_game = None
+_player = None
+
+
+def _init_worker(player: str, ai: str):
+    global _game, _player
+    logger.disabled = True
+    tracer.enabled = False
+    _player = make_engine(player)
+    _game = Connect4Game(ArduinoSim(), RobotSim(), ai=make_engine(ai))
+
+
+def _play_games(first: int, count: int, seed: int) -> bytes:
+    """
+    Records of games first .. first + count - 1, the same whichever worker plays them
+    """
+    records = bytearray()
+    for i in range(first, first + count):
+        for side, engine in (("player", _player), ("ai", _game.ai)):
+            if hasattr(engine, "seed"):
+                engine.seed(f"{seed}-{i}-{side}")
+        player_starts = i % 2 == 1
+        moves, winner = play_game(_game, _player, player_starts)
+        first_color = Connect4Game.PLAYER_COLOR if player_starts else Connect4Game.AI_COLOR
+        records += RECORD.pack(len(moves), pack_moves(moves), first_color, winner or 0)
+    return bytes(records)
+
+
+def read_results(path: str) -> Iterator[Tuple[str, int, Optional[int]]]:
+    """
+    (moves, color that moved first, winner color or None for a draw) of every game of a results file
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    for moves, packed, first, winner in RECORD.iter_unpack(data):
+        game = "".join(str(col + 1) for col in unpack_moves(packed, moves))
+        yield game, first, winner or None
+
+
+def simulate(player: str, ai: str, games: int, out: str, workers: int = os.cpu_count() or 1,
+             chunk: int = 100, seed: int = 0) -> dict:
+    """
+    Play the games and write their records to out in order, returns the totals
+    """
+    totals = {"games": 0, "player_wins": 0, "ai_wins": 0, "draws": 0, "moves": 0}
+    start = time.monotonic()
+    firsts = range(0, games, chunk)
+    counts = [min(chunk, games - first) for first in firsts]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(player, ai)) as executor, \
+            open(out, "wb") as f:
+        for records in executor.map(_play_games, firsts, counts, repeat(seed)):
+            f.write(records)
+            for moves, _, _, winner in RECORD.iter_unpack(records):
+                totals["games"] += 1
+                totals["moves"] += moves
+                if winner == Connect4Game.PLAYER_COLOR:
+                    totals["player_wins"] += 1
+                elif winner == Connect4Game.AI_COLOR:
+                    totals["ai_wins"] += 1
+                else:
+                    totals["draws"] += 1
+    totals["seconds"] = time.monotonic() - start
+    totals["games_per_second"] = totals["games"] / max(totals["seconds"], 1e-9)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--player", default="greedy", help="engine dropping the player's pucks")
+    parser.add_argument("--ai", default="negamax:0.05", help="engine playing as the game's AI")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=100, help="games per task given to a worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="selfplay.bin")
+    parser.add_argument("--dump", metavar="RESULTS", help="print a results file instead")
+    args = parser.parse_args()
+
+    if args.dump:
+        names = {Connect4Game.PLAYER_COLOR: "player", Connect4Game.AI_COLOR: "ai", None: "draw"}
+        for game, first, winner in read_results(args.dump):
+            print(f"{game} {names[first]} {names[winner]}")
+        return
+    logger.setLevel(logging.WARNING)
+    totals = simulate(args.player, args.ai, args.games, args.out, args.workers, args.chunk, args.seed)
+    print(f"{totals['games']} games in {totals['seconds']:.1f}s ({totals['games_per_second']:.1f} games/s): "
+          f"player {totals['player_wins']} wins, ai {totals['ai_wins']} wins, {totals['draws']} draws, "
+          f"{totals['moves'] / max(totals['games'], 1):.1f} moves per game")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+from pathlib import Path
+import yaml
+
+
+def load_config(section: str, path: str = "config.yaml") -> dict:
+    """
+    Return one section of config.yaml, empty if the file or the section is missing
+    """
+    cfg_path = Path(path)
+    if not cfg_path.exists():
+        return {}
+    with cfg_path.open("r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    return config.get(section) or {}
@@ -0,0 +1,224 @@
+"""
+Turn latency tracing: spans timed on the monotonic clock, aggregated per stage into
+HDR-style histograms and exported as a Prometheus text file (textfile collector format)
+or a JSON snapshot.
+
+    from utils.tracing import tracer
+    with tracer.span("robot.place_puck"):
+        ...
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from utils.logger import logger
+
+# sub-buckets per power of two: values are kept within 1 / 2^SUB_BITS (about 3%)
+SUB_BITS = 5
+_SUB = 1 << SUB_BITS
+
+# Prometheus bucket bounds in seconds, from the sensor's milliseconds to the arm's seconds
+PROMETHEUS_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                      1.0, 2.5, 5.0, 10.0, 25.0, 60.0]
+
+
+class Histogram:
+    """
+    Log-linear histogram of durations in microseconds, like HdrHistogram: every power
+    of two is split in 2^SUB_BITS buckets, so the relative error is the same at any
+    scale and recording is a couple of integer operations.
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def bucket(value: int) -> int:
+        if value < _SUB:
+            return value
+        shift = value.bit_length() - SUB_BITS - 1
+        return (shift + 1) * _SUB + (value >> shift) - _SUB
+
+    @staticmethod
+    def bucket_upper(bucket: int) -> int:
+        """
+        Largest value that falls in the bucket
+        """
+        if bucket < 2 * _SUB:
+            return bucket
+        shift = bucket // _SUB - 1
+        return ((bucket % _SUB + _SUB + 1) << shift) - 1
+
+    def record(self, value: int):
+        value = max(value, 0)
+        bucket = self.bucket(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> Optional[int]:
+        """
+        Value at or below which q percent of the recorded values fall, None when empty
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(q / 100 * self.count + 0.5))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.bucket_upper(bucket), self.max)
+        return self.max
+
+    def count_at_most(self, value: int) -> int:
+        return sum(count for bucket, count in self.counts.items() if self.bucket_upper(bucket) <= value)
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.monotonic_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record_ns(self.name, time.monotonic_ns() - self.start)
+        return False
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """
+    Histograms of the stages of a turn, recorded from any thread
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._exporter: Optional[threading.Thread] = None
+
+    def span(self, name: str):
+        """
+        Context manager timing the block as one sample of the stage
+        """
+        return _Span(self, name) if self.enabled else _NO_SPAN
+
+    def record(self, name: str, seconds: float):
+        self.record_ns(name, int(seconds * 1e9))
+
+    def record_ns(self, name: str, nanoseconds: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(nanoseconds // 1000)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def snapshot(self) -> dict:
+        """
+        Count, total and percentiles of every stage, in seconds
+        """
+        with self._lock:
+            stages = {}
+            for name, h in sorted(self.histograms.items()):
+                stages[name] = {
+                    "count": h.count,
+                    "sum": h.total * 1e-6,
+                    "min": h.min * 1e-6,
+                    "max": h.max * 1e-6,
+                    **{f"p{q:g}": h.percentile(q) * 1e-6 for q in (50, 90, 99, 99.9)},
+                }
+        return {"time": time.time(), "stages": stages}
+
+    def prometheus(self, metric: str = "connect4_stage_seconds") -> str:
+        """
+        The histograms in the Prometheus text exposition format
+        """
+        lines = [f"# HELP {metric} Duration of the stages of a turn.", f"# TYPE {metric} histogram"]
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                for le in PROMETHEUS_BUCKETS:
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{le:g}"}} {h.count_at_most(int(le * 1e6))}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {h.total * 1e-6:.6f}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        _write_atomic(path, self.prometheus())
+
+    def write_json(self, path: str):
+        _write_atomic(path, json.dumps(self.snapshot(), indent=2))
+
+    def export(self, prometheus: Optional[str] = None, json_path: Optional[str] = None):
+        if prometheus:
+            self.write_prometheus(prometheus)
+        if json_path:
+            self.write_json(json_path)
+
+    def start_exporter(self, every: float, prometheus: Optional[str] = None, json_path: Optional[str] = None):
+        """
+        Export every `every` seconds on a background thread
+        """
+        def run():
+            while True:
+                time.sleep(every)
+                try:
+                    self.export(prometheus, json_path)
+                except OSError as e:
+                    logger.warning(f"Could not export the traces: {e}")
+
+        self._exporter = threading.Thread(target=run, name="trace-exporter", daemon=True)
+        self._exporter.start()
+
+    def configure(self, config: dict):
+        """
+        Apply the tracing section of config.yaml: enabled, prometheus / json paths, export_every
+        """
+        self.enabled = bool(config.get("enabled", True))
+        if self.enabled and (config.get("prometheus") or config.get("json")) and self._exporter is None:
+            self.start_exporter(config.get("export_every", 30.0), config.get("prometheus"), config.get("json"))
+
+
+def _write_atomic(path: str, text: str):
+    """
+    Readers (e.g. the node exporter) never see half a file
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Default tracer the game, AI and hardware record to
+tracer = Tracer()
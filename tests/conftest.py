@@ -0,0 +1,39 @@
+import stat
+import sys
+import textwrap
+
+import pytest
+
+from connect4_engine import game
+
+
+@pytest.fixture(autouse=True)
+def ai_config(tmp_path, monkeypatch):
+    """
+    The ai section games built without an ai get instead of config.yaml's:
+    the move cache in tmp_path, no pondering
+    """
+    config = {"cache_path": str(tmp_path / "move_cache.sqlite"), "ponder": False}
+    monkeypatch.setattr(game, "load_config", lambda section, path="config.yaml": config if section == "ai" else {})
+    return config
+
+
+@pytest.fixture
+def make_solver(tmp_path):
+    """
+    Writes a python script standing in for c4solver, returns its path
+    """
+    def make(source: str, name: str = "fake_solver") -> str:
+        path = tmp_path / name
+        path.write_text(f"#!{sys.executable}\n" + textwrap.dedent(source))
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+        return str(path)
+    return make
+
+
+@pytest.fixture
+def fake_solver(request, make_solver):
+    """
+    The FAKE_SOLVER script of the test module as a c4solver executable
+    """
+    return make_solver(request.module.FAKE_SOLVER)
@@ -0,0 +1,116 @@
+import random
+import sys
+import time
+
+from connect4_engine.core import ai as ai_module
+from connect4_engine.core.ai import AINegamax, AIPascalPons, SolverTimeout, make_ai, make_ponder_ai
+from connect4_engine.core.board import Board
+
+# a c4solver built before it answered every line: the probe gets no answer
+SILENT_SOLVER = """
+import sys
+for line in sys.stdin:
+    pass
+"""
+
+
+def _play(moves: str, **kwargs) -> Board:
+    board = Board(**kwargs)
+    for move in moves:
+        board.play(int(move) - 1)
+    return board
+
+
+def test_winning_cells_match_board_threats():
+    rng = random.Random(1)
+    ai = AINegamax()
+    for width, height, connect in ((7, 6, 4), (8, 7, 5), (5, 4, 3)):
+        for _ in range(50):
+            board = Board(width, height, connect)
+            for _ in range(rng.randrange(width * height // 2)):
+                board.play(rng.choice(board.available_actions()))
+                if board.done:
+                    board.undo()
+                    break
+            ai._setup(board)
+            for player in (Board.P_RED, Board.P_YELLOW):
+                assert ai._winning_cells(board.player_bits(player), board.mask) == board.threats(player)
+
+
+def test_takes_the_win_and_blocks():
+    ai = AINegamax(time_budget=1)
+    assert ai.choose_move(_play("121212")) == 0
+    # red threatens column 1, yellow has to block it
+    assert ai.choose_move(_play("12121")) == 0
+
+
+def test_finds_a_double_threat():
+    ai = AINegamax(time_budget=1)
+    assert ai.choose_move(_play("4455")) in (2, 5)
+    assert ai.last_score > 0
+
+
+def test_answers_within_the_time_budget():
+    ai = AINegamax(time_budget=0.3)
+    start = time.monotonic()
+    col = ai.choose_move(Board())
+    assert time.monotonic() - start < 1.0
+    assert col in range(7)
+    assert ai.last_depth >= 1
+
+
+def test_max_depth():
+    ai = AINegamax(time_budget=10, max_depth=3)
+    ai.choose_move(Board())
+    assert ai.last_depth == 3
+
+
+class FakePool:
+    """answers col after delay seconds, times out like SolverPool"""
+
+    def __init__(self, delay, col):
+        self.delay = delay
+        self.col = col
+
+    def analyze(self, board, timeout=None):
+        if timeout is not None and self.delay > timeout:
+            time.sleep(timeout)
+            raise SolverTimeout("too slow")
+        time.sleep(self.delay)
+        return self.col, [0] * 7
+
+
+def _tiered_ai(strong_delay, weak_delay):
+    ai = AIPascalPons(pool=FakePool(strong_delay, 1))
+    ai._weak = FakePool(weak_delay, 2)
+    return ai
+
+
+def test_strong_solver_answers_in_time():
+    ai = _tiered_ai(0.0, 0.0)
+    assert ai.choose_move(Board(), deadline=time.monotonic() + 1) == 1
+    assert ai.last_tier == "strong"
+    assert ai.last_scores == [0] * 7
+
+
+def test_weak_solver_takes_over():
+    ai = _tiered_ai(5.0, 0.0)
+    assert ai.choose_move(Board(), deadline=time.monotonic() + 1) == 2
+    assert ai.last_tier == "weak"
+
+
+def test_heuristic_answers_by_the_deadline():
+    ai = _tiered_ai(5.0, 5.0)
+    deadline = time.monotonic() + 1
+    assert ai.choose_move(_play("121212"), deadline=deadline) == 0
+    assert ai.last_tier == "heuristic"
+    assert time.monotonic() < deadline + 0.1
+
+
+def test_stale_solver_falls_back_to_negamax(make_solver, monkeypatch):
+    # the solver_pool module the AI imported
+    monkeypatch.setattr(sys.modules[ai_module.SolverPool.__module__], "PROBE_TIMEOUT", 0.3)
+    monkeypatch.setattr(ai_module, "load_binding", lambda: None)
+    executable = make_solver(SILENT_SOLVER)
+    assert isinstance(make_ai(0.1, ai_executable_path=executable), AINegamax)
+    assert isinstance(make_ponder_ai(1.0, 0.1, executable=executable), AINegamax)
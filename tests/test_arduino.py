@@ -0,0 +1,100 @@
+import threading
+import time
+
+from connect4_engine.hardware.arduino import ArduinoCommunicator, Drop, Log, Start, parse_line
+
+
+class FakeSerial:
+    """
+    Returns the pushed lines, and an empty line at once when there is none (timeout=0)
+    """
+    def __init__(self):
+        self.lines = []
+        self.reads = 0
+        self.written = []
+
+    def push_line(self, line: str):
+        self.lines.append(line + "\n")
+
+    def readline(self):
+        self.reads += 1
+        if self.lines:
+            return self.lines.pop(0).encode("utf-8")
+        return b""
+
+    def write(self, data: bytes):
+        self.written.append(data.decode("utf-8").strip())
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_lines_are_parsed_into_events():
+    assert parse_line("START", 1.0) == Start(1.0)
+    assert parse_line("DROP 3", 1.0) == Drop(3, 1.0)
+    assert parse_line("LOG sensor 2 ok", 1.0) == Log("sensor 2 ok", 1.0)
+    assert parse_line("DROP x", 1.0) is None
+    assert parse_line("OK", 1.0) is None
+
+
+def test_reads_go_on_while_the_game_is_busy():
+    ser = FakeSerial()
+    arduino = ArduinoCommunicator(ser)
+    drops = []
+
+    def on_drop(col):
+        drops.append(col)
+        time.sleep(0.3)  # the AI's turn and the robot's moves
+
+    arduino.set_on_puck_dropped_callback(on_drop)
+    arduino.set_game_start_callback(lambda: None)
+    for line in ("DROP 1", "START", "DROP 2", "LOG moving", "DROP 4"):
+        ser.push_line(line)
+    consumer = threading.Thread(target=arduino.read_loop, daemon=True)
+    consumer.start()
+    try:
+        _wait_for(lambda: drops == [2])
+        # every line was read while the first drop was still being handled
+        assert arduino.stats()["received"] == 5
+        _wait_for(lambda: drops == [2, 4])
+    finally:
+        arduino.stop()
+        consumer.join(1.0)
+    # drops before START are ignored
+    assert arduino.stats()["dropped"] == {"Start": 0, "Drop": 0, "Log": 0}
+
+
+def test_full_queue_drops_logs_and_holds_back_drops():
+    ser = FakeSerial()
+    arduino = ArduinoCommunicator(ser, queue_size=2)
+    drops = []
+    arduino.set_on_puck_dropped_callback(drops.append)
+    arduino.set_game_start_callback(lambda: None)
+    for line in ("START", "LOG a", "LOG b", "DROP 5", "LOG c"):
+        ser.push_line(line)
+    arduino.start()
+    try:
+        _wait_for(lambda: arduino.stats()["received"] == 4)
+        time.sleep(0.2)
+        stats = arduino.stats()
+        assert stats["dropped"]["Log"] == 1  # LOG b, the queue was full
+        assert stats["received"] == 4  # DROP 5 waits for room, LOG c isn't read yet
+        while arduino.dispatch(timeout=0.5):
+            pass
+        assert drops == [5]
+        assert arduino.stats()["high_water"] == 2
+    finally:
+        arduino.stop()
+
+
+def test_empty_reads_do_not_spin():
+    ser = FakeSerial()
+    arduino = ArduinoCommunicator(ser)
+    arduino.start()
+    time.sleep(0.3)
+    arduino.stop()
+    assert ser.reads < 0.3 / ArduinoCommunicator.IDLE_WAIT + 5
@@ -100,3 +100,150 @@ def test_reset():
     assert np.all(b.grid == Board.P_EMPTY)
     assert b.done is False
     assert b.winner is None
+
+
+def test_bitboards_follow_drops():
+    b = Board()
+    b.drop_piece(3, Board.P_RED)
+    b.drop_piece(3, Board.P_YELLOW)
+    b.drop_piece(4, Board.P_RED)
+    # column 3 takes bits 21..26, column 4 bits 28..33 (same layout as Position.hpp)
+    assert b.mask == (1 << 21) | (1 << 22) | (1 << 28)
+    assert b.player_bits(Board.P_RED) == (1 << 21) | (1 << 28)
+    assert b.player_bits(Board.P_YELLOW) == 1 << 22
+    assert b.to_move == Board.P_YELLOW
+    assert b.pons_string == "445"
+
+
+def test_grid_writes_are_picked_up():
+    b = Board()
+    b.grid[0][2] = Board.P_YELLOW
+    assert b.available_cell(2) == 1
+    assert b.player_bits(Board.P_YELLOW) == 1 << 14
+
+
+def test_grid_reads_keep_the_bitboards():
+    b = Board()
+    for col in (3, 3, 4):
+        b.play(col)
+    assert b.grid.shape == (6, 7)
+    assert b.grid[0][3] == Board.P_RED
+    b.display()
+    assert not b._grid_dirty
+    assert b.pons_string == "445"
+
+
+def test_grid_writes_rebuild_the_moves():
+    b = Board()
+    b.grid[0][3] = Board.P_RED
+    assert b.to_move == Board.P_YELLOW
+    b.grid[1][3] = Board.P_YELLOW
+    b.grid[0][4] = Board.P_RED
+    assert b.to_move == Board.P_YELLOW
+    assert b.pons_string == "445"
+    b.play(4)
+    assert b.grid[1][4] == Board.P_YELLOW
+    b.undo()
+    b.undo()
+    assert b.heights[4] == 0
+
+
+def test_drop_piece_sets_result_from_last_move():
+    b = Board()
+    for c in (0, 1, 2):
+        b.drop_piece(c, Board.P_RED)
+        b.drop_piece(c, Board.P_YELLOW)
+    assert b.done is False
+    assert b.moves == 6
+    b.drop_piece(3, Board.P_RED)
+    assert b.done is True
+    assert b.winner == Board.P_RED
+
+
+def test_full_board_without_alignment_is_draw():
+    b = Board()
+    player = Board.P_RED
+    for move in "547125662261271266215743771576315353334444":
+        b.drop_piece(int(move) - 1, player)
+        player = Board.P_RED + Board.P_YELLOW - player
+    assert b.moves == b.width * b.height
+    assert b.done is True
+    assert b.winner is None
+    assert b.is_draw()
+
+
+def _play(moves: str) -> Board:
+    b = Board()
+    player = Board.P_RED
+    for move in moves:
+        b.drop_piece(int(move) - 1, player)
+        player = Board.P_RED + Board.P_YELLOW - player
+    return b
+
+
+def test_key_ignores_move_order():
+    assert _play("4455").key() == _play("5544").key()
+    assert _play("4455").key() != _play("4545").key()
+    # values from connect4ai Position::key()
+    assert _play("4").key() == 2097152
+    assert _play("3443232").key() == 8601984
+
+
+def test_canonical_key_folds_mirror_images():
+    assert _play("12").canonical_key() == _play("76").canonical_key()
+    assert _play("12").key() != _play("76").key()
+    # values from connect4ai Position::key3()
+    assert _play("4455").canonical_key() == 1260
+    assert _play("3443232").canonical_key() == 34611
+
+
+def test_play_undo_restores_position():
+    b = _play("4453")
+    before = (b.key(), b.pons_string, b.heights[:], b._grid.copy(), b.to_move)
+    for col in (2, 2, 3, 6):
+        b.play(col)
+    assert b.pons_string == "44533347"
+    for _ in range(4):
+        b.undo()
+    assert (b.key(), b.pons_string, b.heights) == before[:3]
+    assert np.array_equal(b._grid, before[3])
+    assert b.to_move == before[4]
+
+
+def test_undo_clears_win():
+    b = _play("112233")
+    b.play(3)
+    assert b.winner == Board.P_RED
+    b.undo()
+    assert b.done is False
+    assert b.winner is None
+    with pytest.raises(Exception):
+        _play("1122334").play(4)  # game already over
+
+
+def test_undo_keeps_earlier_win():
+    b = _play("1122334")
+    b.drop_piece(5, Board.P_YELLOW, quiet=True)  # the arduino reports drops even after a win
+    b.undo()
+    assert b.done is True
+    assert b.winner == Board.P_RED
+
+
+def test_custom_geometry():
+    b = Board(width=9, height=7, connect=5)
+    assert b.grid.shape == (7, 9)
+    for col in range(4, 9):
+        b.drop_piece(col, Board.P_YELLOW, quiet=True)
+    assert b.winner == Board.P_YELLOW
+    assert b.pons_string == "56789"
+    assert Board(9, 7, 5).geometry is b.geometry  # masks are built once per geometry
+    assert len(Board().geometry.lines) == 69
+
+
+def test_threats():
+    b = Board()
+    for col in (1, 2, 3):
+        b.drop_piece(col, Board.P_RED, quiet=True)
+    # red completes the bottom row in column 0 or column 4
+    assert b.threats(Board.P_RED) == (1 << 0) | (1 << 28)
+    assert b.count_threats(Board.P_YELLOW) == 0
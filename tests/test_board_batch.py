@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from connect4_engine.core.board import Board
+from connect4_engine.core.board_batch import BoardBatch
+
+
+def test_drop_piece_and_legal_moves():
+    bb = BoardBatch(3)
+    for _ in range(bb.height):
+        bb.drop_piece([0, 1, -1], Board.P_RED)
+    legal = bb.legal_moves()
+    assert not legal[0, 0] and legal[0, 1]
+    assert not legal[1, 1] and legal[1, 0]
+    assert legal[2].all()
+    assert bb.moves.tolist() == [6, 6, 0]
+    with pytest.raises(Exception):
+        bb.drop_piece([0, 2, 2], Board.P_RED)
+
+
+def test_win_and_pons_strings():
+    bb = BoardBatch(2)
+    player = Board.P_RED
+    # board 0: vertical red win in column 4, board 1: same moves mirrored on columns 1 and 2
+    for cols in ([3, 1], [2, 0], [3, 1], [2, 0], [3, 1], [2, 0], [3, 1]):
+        bb.drop_piece(cols, player)
+        player = Board.P_RED + Board.P_YELLOW - player
+    assert bb.done.tolist() == [True, True]
+    assert bb.winner.tolist() == [Board.P_RED, Board.P_RED]
+    assert bb.pons_strings().tolist() == ["4343434", "2121212"]
+
+
+def test_grids_match_board():
+    board = Board()
+    bb = BoardBatch(1)
+    player = Board.P_YELLOW
+    for col in (3, 3, 2, 4, 6, 0):
+        board.drop_piece(col, player)
+        bb.drop_piece([col], player)
+        player = Board.P_RED + Board.P_YELLOW - player
+    assert np.array_equal(bb.grids()[0], board.grid)
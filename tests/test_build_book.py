@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from connect4_engine.core.board import Board
+from connect4_engine.core.opening_book import OpeningBook
+from connect4_engine.tools.build_book import book_key_bytes, build_book, enumerate_positions
+
+# scores a position by its number of moves
+FAKE_SOLVER = """
+import sys
+for line in sys.stdin:
+    print(len(line.strip()) - 3, flush=True)
+"""
+
+
+def test_positions_are_enumerated_once_up_to_mirror_images():
+    positions = enumerate_positions(3)
+    assert [len(p) for p in positions].count(1) == 4
+    keys = set()
+    for moves in positions:
+        b = Board()
+        for move in moves:
+            b.play(int(move) - 1)
+        keys.add(b.canonical_key())
+    assert len(keys) == len(positions)
+    # every position of 3 moves, folded by symmetry
+    all_keys = set()
+    for a in range(7):
+        for b in range(7):
+            for c in range(7):
+                board = Board()
+                for col in (a, b, c):
+                    board.play(col)
+                all_keys.add(board.canonical_key())
+    assert all_keys <= keys
+
+
+def test_key_bytes_follow_generator():
+    assert book_key_bytes(14, 23) == 2
+    assert book_key_bytes(4, 21) == 1
+
+
+def test_build_and_resume(tmp_path, fake_solver):
+    work_dir = str(tmp_path / "work")
+    out = str(tmp_path / "test.book")
+    scores = build_book(3, out, work_dir, workers=2, shard_size=20, executable=fake_solver)
+    assert len(scores) == len(enumerate_positions(3))
+
+    book = OpeningBook(out)
+    assert book.depth == 3
+    board = Board()
+    assert book.get(board) == -3
+    board.play(3)
+    board.play(2)
+    assert book.get(board) == -1
+
+    # a run killed half way resumes from the solved shards
+    os.remove(os.path.join(work_dir, "shard-00001.scores"))
+    mtime = os.path.getmtime(os.path.join(work_dir, "shard-00000.scores"))
+    assert build_book(3, out, work_dir, workers=1, shard_size=20, executable=fake_solver) == scores
+    assert os.path.getmtime(os.path.join(work_dir, "shard-00000.scores")) == mtime
+    with pytest.raises(Exception):
+        build_book(4, out, work_dir, workers=1, shard_size=20, executable=fake_solver)
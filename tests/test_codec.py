@@ -0,0 +1,45 @@
+import pytest
+
+from connect4_engine.core.board import Board
+from connect4_engine.core import codec
+
+
+def _play(moves: str, first=Board.P_RED) -> Board:
+    b = Board()
+    player = first
+    for move in moves:
+        b.drop_piece(int(move) - 1, player, quiet=True)
+        player = Board.P_RED + Board.P_YELLOW - player
+    return b
+
+
+def test_round_trip():
+    board = _play("4453342", first=Board.P_YELLOW)
+    data = codec.encode(board)
+    assert len(data) == codec.SNAPSHOT_SIZE
+    decoded = codec.decode(data)
+    assert decoded.pons_string == "4453342"
+    assert decoded.key() == board.key()
+    assert (decoded.grid == board.grid).all()
+
+
+def test_full_game_fits():
+    moves = "547125662261271266215743771576315353334444"
+    assert codec.decode(codec.encode(_play(moves))).pons_string == moves
+
+
+def test_encode_many_and_views():
+    boards = [_play(""), _play("1"), _play("7766")]
+    buf = codec.encode_many(boards)
+    assert len(buf) == 3 * codec.SNAPSHOT_SIZE
+    assert [b.pons_string for b in codec.decode_many(memoryview(buf))] == ["", "1", "7766"]
+    view = codec.snapshots(buf)
+    assert view["moves"].tolist() == [0, 1, 4]
+    assert view["key"].tolist() == [b.key() for b in boards]
+
+
+def test_corrupted_snapshot():
+    data = bytearray(codec.encode(_play("44")))
+    data[0] ^= 1
+    with pytest.raises(Exception):
+        codec.decode(data)
@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import pytest
 
 from connect4_engine.game import Connect4Game
@@ -90,3 +91,43 @@ def test_horizontal_diagonal_ai_win_and_draw(monkeypatch):
     monkeypatch.setattr(game.board, "is_player_winner", lambda player: False)
     assert game.check_winner() is True
     assert messages[-1] == "It's a draw!"
+
+
+class SlowRobot(RobotDummy):
+    """records the arm's steps, the puck pickup takes 0.3s"""
+
+    def __init__(self, arduino):
+        super().__init__(arduino)
+        self.steps = []
+
+    def pick_up_ai_puck(self, puck_no):
+        time.sleep(0.3)
+        self.steps.append("pick_up")
+
+    def place_puck(self, column, puck_no):
+        self.steps.append(f"place {column}")
+
+    def give_player_puck(self, puck_no):
+        self.steps.append("give_player_puck")
+
+    def reset(self):
+        self.steps.append("home")
+
+
+class SlowAI:
+    def choose_move(self, board):
+        time.sleep(0.3)
+        return 2
+
+
+def test_ai_turn_picks_the_puck_up_while_thinking():
+    arduino = ArduinoDummy()
+    robot = SlowRobot(arduino)
+    game = Connect4Game(arduino=arduino, robot=robot, player_starts=False)
+    game.ai = SlowAI()
+    game.ponderer = None
+
+    game.ai_turn()
+    assert robot.steps == ["pick_up", "place 2", "give_player_puck"]
+    assert game.board.pons_string == "3"
+    assert game.last_turn_times["turn"] < 0.5
@@ -0,0 +1,126 @@
+import os
+
+import pytest
+
+from connect4_engine.core.journal import AI, PLAYER, RECORD, GameJournal
+from connect4_engine.game import Connect4Game
+from connect4_engine.hardware.mock import ArduinoSim, RobotSim
+
+
+class FirstColumnAI:
+    def choose_move(self, board):
+        return board.available_actions()[0]
+
+
+class CrashingAI:
+    def choose_move(self, board):
+        raise RuntimeError("the controller died")
+
+
+def _game(journal):
+    return Connect4Game(ArduinoSim(), RobotSim(), ai=FirstColumnAI(), journal=journal)
+
+
+def test_interrupted_game_resumes(tmp_path):
+    path = str(tmp_path / "game.journal")
+    journal = GameJournal(path)
+    game = _game(journal)
+    game.game_start()
+    game.arduino.drop(3)
+    game.arduino.drop(3)
+    assert game.board.pons_string == "14141"
+    journal.flush()
+    journal.close()  # the controller dies here, in the player's turn
+
+    journal = GameJournal(path)
+    resumed = _game(journal)
+    assert resumed.resume()
+    assert resumed.board.pons_string == "14141"
+    assert resumed.turns_taken == {'player': 2, 'ai': 3}
+    assert resumed.turn == 'player'
+    resumed.arduino.drop(3)
+    assert resumed.last_result == ("1414141", Connect4Game.AI_COLOR)
+    journal.close()
+
+
+def test_ai_plays_when_it_was_its_turn(tmp_path):
+    path = str(tmp_path / "game.journal")
+    journal = GameJournal(path)
+    journal.game_started(player_starts=True)
+    journal.move(PLAYER, 3, 0)
+    journal.close()
+    with open(path, "ab") as f:
+        f.write(b"\x02\x01")  # torn record of the AI's move
+
+    journal = GameJournal(path)
+    assert journal.live.moves == [(PLAYER, 3, 0)]
+    game = _game(journal)
+    assert game.resume()
+    assert game.board.pons_string == "41"
+    assert game.turns_taken == {'player': 1, 'ai': 1}
+    journal.close()
+    assert os.path.getsize(path) == 3 * RECORD.size
+
+
+def test_finished_games_are_compacted_away(tmp_path):
+    path = str(tmp_path / "game.journal")
+    journal = GameJournal(path, max_bytes=100)
+    game = _game(journal)
+    for _ in range(3):
+        game.game_start()
+        while game.board.moves:
+            game.arduino.drop(6)
+    game.game_start()
+    journal.flush()
+    assert journal.rotations > 0
+    assert os.path.exists(path + ".1")
+    journal.close()
+
+    # only the game in progress is left
+    assert os.path.getsize(path) <= 100
+    journal = GameJournal(path)
+    assert [(side, column) for side, column, _ in journal.live.moves] == [(AI, 0)]
+    assert not _game(GameJournal(str(tmp_path / "empty.journal"))).resume()
+    journal.close()
+
+
+def test_second_game_resumes_before_the_ai_moved(tmp_path):
+    path = str(tmp_path / "game.journal")
+    journal = GameJournal(path)
+    game = _game(journal)
+    game.game_start()
+    while game.board.moves:
+        game.arduino.drop(6)
+    pucks = dict(game.turns_taken)
+    assert pucks['ai'] > 0
+    game.ai = CrashingAI()
+    with pytest.raises(RuntimeError):
+        game.game_start()  # dies before the AI's first move of the second game
+    journal.flush()
+    journal.close()
+
+    journal = GameJournal(path)
+    assert journal.live.moves == []
+    resumed = _game(journal)
+    assert resumed.resume()
+    assert resumed.board.pons_string == "1"
+    assert journal.live.pucks == (pucks['player'], pucks['ai'])
+    assert resumed.turns_taken == {'player': pucks['player'], 'ai': pucks['ai'] + 1}
+    journal.close()
+
+    # the AI's move went on with the puck after the first game's
+    journal = GameJournal(path)
+    assert journal.live.moves == [(AI, 0, pucks['ai'])]
+    journal.close()
+
+
+def test_puck_numbers_keep_counting_across_games(tmp_path):
+    path = str(tmp_path / "game.journal")
+    journal = GameJournal(path)
+    journal.game_started(False)
+    journal.move(AI, 2, 300)
+    journal.close()
+
+    journal = GameJournal(path)
+    assert journal.live.moves == [(AI, 2, 300)]
+    journal.close()
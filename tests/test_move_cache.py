@@ -0,0 +1,45 @@
+from connect4_engine.core.board import Board
+from connect4_engine.core.move_cache import MoveCache
+
+
+def _play(moves: str) -> Board:
+    b = Board()
+    for move in moves:
+        b.play(int(move) - 1)
+    return b
+
+
+def test_mirror_positions_share_entry():
+    cache = MoveCache()
+    cache.put(_play("12"), 1)
+    # mirror image of "12" is "76", the stored move comes back flipped
+    assert cache.get(_play("76")) == 5
+    assert cache.get(_play("12")) == 1
+    assert cache.get(_play("13")) is None
+    stats = cache.stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = MoveCache(capacity=2)
+    cache.put(_play("1"), 0)
+    cache.put(_play("2"), 0)
+    cache.get(_play("1"))
+    cache.put(_play("3"), 0)  # evicts "2", the least recently used
+    assert cache.get(_play("2")) is None
+    assert cache.get(_play("1")) == 0
+
+
+def test_persists_on_disk(tmp_path):
+    path = str(tmp_path / "moves.sqlite")
+    cache = MoveCache(path)
+    cache.put(_play("4453"), 2)
+    cache.close()
+
+    cache = MoveCache(path)
+    assert cache.get(_play("4453")) == 2
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get(_play("4453")) == 2
+    assert cache.stats()["memory_hits"] == 1
+    cache.close()
@@ -0,0 +1,86 @@
+import pytest
+
+from connect4_engine.core.ai import AIPascalPons
+from connect4_engine.core.board import Board
+from connect4_engine.core.opening_book import OpeningBook, load_book, next_prime, save_book
+from connect4_engine.core.solver_binding import INVALID_MOVE
+
+
+class NoSolver:
+    def analyze(self, board, timeout=None):
+        raise AssertionError("the solver should not be asked")
+
+
+def _play(moves: str) -> Board:
+    board = Board()
+    for move in moves:
+        board.play(int(move) - 1)
+    return board
+
+
+@pytest.fixture
+def book_path(tmp_path):
+    # every reply to 1 4 gets a score, and the position 1 4 itself
+    board = _play("14")
+    scores = {board.canonical_key(): 2}
+    for col in range(7):
+        board.play(col)
+        scores[board.canonical_key()] = col - 3
+        board.undo()
+    path = str(tmp_path / "test.book")
+    save_book(path, scores, depth=3, log_size=10)
+    return path
+
+
+def test_next_prime():
+    assert [next_prime(n) for n in (2, 4, 1 << 10, 1 << 21)] == [2, 5, 1031, 2097169]
+
+
+def test_lookups(book_path):
+    book = OpeningBook(book_path)
+    assert (book.depth, book.size, book.key_bytes) == (3, 1031, 2)
+    assert book.get(_play("14")) == 2
+    assert book.get(_play("74")) == 2  # mirror image
+    assert book.get(_play("44")) is None
+    assert book.get(_play("1444")) is None  # deeper than the book
+    assert book.analyze(_play("14")) == [3, 2, 1, 0, -1, -2, -3]
+    assert book.choose_move(_play("14")) == 0
+    assert book.analyze(_play("44")) is None
+    book.close()
+
+
+def test_winning_moves_and_full_columns(tmp_path):
+    board = _play("121212")
+    scores = {}
+    for col in range(1, 7):
+        board.play(col)
+        scores[board.canonical_key()] = 0
+        board.undo()
+    path = str(tmp_path / "late.book")
+    save_book(path, scores, depth=7, log_size=10)
+    assert OpeningBook(path).analyze(board) == [18, 0, 0, 0, 0, 0, 0]
+
+    # nothing to look up for a full column
+    board = _play("111111")
+    scores = {}
+    for col in range(1, 7):
+        board.play(col)
+        scores[board.canonical_key()] = 1
+        board.undo()
+    save_book(path, scores, depth=7, log_size=10)
+    assert OpeningBook(path).analyze(board)[0] == INVALID_MOVE
+
+
+def test_invalid_books(tmp_path, book_path):
+    with pytest.raises(Exception):
+        OpeningBook(book_path, width=8, height=7)
+    truncated = tmp_path / "truncated.book"
+    truncated.write_bytes(open(book_path, "rb").read()[:100])
+    assert load_book(str(truncated)) is None
+    assert load_book(str(tmp_path / "missing.book")) is None
+
+
+def test_ai_answers_book_positions(book_path):
+    ai = AIPascalPons(pool=NoSolver(), opening_book=OpeningBook(book_path))
+    assert ai.choose_move(_play("14")) == 0
+    assert ai.last_tier == "book"
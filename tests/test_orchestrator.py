@@ -0,0 +1,43 @@
+import time
+
+from connect4_engine.hardware.mock import ArduinoSim, RobotSim
+from connect4_engine.orchestrator import Orchestrator
+
+# every column scores the same after a short think, the first one is played
+FAKE_SOLVER = """
+import sys, time
+for line in sys.stdin:
+    time.sleep(0.2)
+    print("0 0 0 0 0 0 0", flush=True)
+"""
+
+
+class SlowArm(RobotSim):
+    def pick_up_ai_puck(self, puck_no):
+        time.sleep(1.0)
+
+
+def test_slow_arm_does_not_hold_up_other_tables(fake_solver):
+    orchestrator = Orchestrator(2, ai_config={}, executable=fake_solver)
+    try:
+        slow = orchestrator.add_table("slow", ArduinoSim(), SlowArm())
+        fast = orchestrator.add_table("fast", ArduinoSim(), RobotSim())
+        start = time.monotonic()
+        started = [table.post(table.game.game_start) for table in (slow, fast)]
+        started[1].result()
+        fast_done = time.monotonic() - start
+        started[0].result()
+
+        assert fast_done < 0.8
+        assert fast.turn_times[-1]["turn"] < 0.8
+        assert slow.turn_times[-1]["pickup"] >= 1.0
+        assert slow.game.board.pons_string == fast.game.board.pons_string == "1"
+
+        # the player's puck on the fast table is answered from the shared pool too
+        fast.arduino.drop(3).result()
+        assert fast.game.board.pons_string == "141"
+        stats = orchestrator.stats()
+        assert stats["pool"]["queries"] == 3
+        assert stats["tables"]["fast"]["turns"] == 2
+    finally:
+        orchestrator.close()
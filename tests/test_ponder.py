@@ -0,0 +1,96 @@
+import threading
+import time
+
+from connect4_engine.core.ai import make_ponder_ai
+from connect4_engine.core.board import Board
+from connect4_engine.core.ponder import Ponderer
+
+# a solver that rejects invalid positions but never finishes a search
+SLOW_SOLVER = """
+import sys, time
+for line in sys.stdin:
+    if line.strip() == "0":
+        print(flush=True)
+    else:
+        time.sleep(60)
+"""
+
+
+class EchoAI:
+    """replies in the column the player just played"""
+
+    def choose_move(self, board):
+        return int(board.pons_string[-1]) - 1
+
+
+class BlockingAI:
+    def __init__(self):
+        self.release = threading.Event()
+        self.interrupted = False
+
+    def choose_move(self, board):
+        self.release.wait(5)
+        return 0
+
+    def interrupt(self):
+        self.interrupted = True
+        self.release.set()
+
+
+def test_replies_are_ready_for_every_player_move():
+    board = Board()
+    board.drop_piece(3, Board.P_YELLOW, quiet=True)
+    ponderer = Ponderer(EchoAI(), Board.P_RED)
+    ponderer.start(board)
+    ponderer._thread.join(5)
+
+    board.drop_piece(5, Board.P_RED, quiet=True)
+    assert ponderer.take(board) == 5
+
+
+def test_cancel_interrupts_search():
+    ai = BlockingAI()
+    ponderer = Ponderer(ai, Board.P_RED)
+    board = Board()
+    ponderer.start(board)
+    board.drop_piece(0, Board.P_RED, quiet=True)
+    assert ponderer.take(board) is None
+    assert ai.interrupted
+    ponderer._thread.join(5)
+    assert not ponderer._thread.is_alive()
+
+
+def test_cancel_kills_the_solve_in_flight(make_solver):
+    ai = make_ponder_ai(60.0, executable=make_solver(SLOW_SOLVER))
+    try:
+        ponderer = Ponderer(ai, Board.P_RED)
+        board = Board()
+        board.drop_piece(3, Board.P_YELLOW, quiet=True)
+        ponderer.start(board)
+        deadline = time.monotonic() + 5
+        while ai.pool.stats()["in_flight"] == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        start = time.monotonic()
+        ponderer.cancel()
+        ponderer._thread.join(5)
+        assert not ponderer._thread.is_alive()
+        assert time.monotonic() - start < 2
+        assert ai.pool.stats()["in_flight"] == 0
+    finally:
+        ai.pool.close()
+
+
+def test_ponder_queries_stop_at_the_budget(make_solver):
+    ai = make_ponder_ai(60.0, executable=make_solver(SLOW_SOLVER))  # the query alone would wait 60s
+    try:
+        board = Board()
+        board.drop_piece(3, Board.P_YELLOW, quiet=True)
+        ponderer = Ponderer(ai, Board.P_RED, time_budget=0.3)
+        start = time.monotonic()
+        ponderer.start(board)
+        ponderer._thread.join(5)
+        assert not ponderer._thread.is_alive()
+        assert time.monotonic() - start < 2
+    finally:
+        ai.pool.close()
@@ -0,0 +1,46 @@
+from connect4_engine.tools.review_games import read_games, read_reviews, review_games
+
+# scores every column, symmetric like the real solver: the center is best
+FAKE_SOLVER = """
+import sys
+for line in sys.stdin:
+    bonus = len(line.strip()) % 3
+    print(" ".join(str(bonus - abs(3 - col)) for col in range(7)), flush=True)
+"""
+
+# the lines Connect4Game logs for a game, then a game of an older log without "Game record:"
+LOG = """\
+2025-01-01 10:00:00 - INFO - game_start() - Game started!
+2025-01-01 10:00:01 - INFO - ai_turn() - AI dropped piece in column 3
+2025-01-01 10:00:02 - INFO - piece_dropped_in_board() - Player dropped piece in column 0
+2025-01-01 10:00:03 - INFO - ai_turn() - AI dropped piece in column 3
+2025-01-01 10:00:04 - INFO - game_over() - AI wins!
+2025-01-01 10:00:04 - INFO - game_over() - Game record: 414
+2025-01-01 10:01:00 - INFO - game_start() - Game started!
+2025-01-01 10:01:01 - INFO - ai_turn() - AI dropped piece in column 3
+2025-01-01 10:01:02 - INFO - piece_dropped_in_board() - Player dropped piece in column 4
+2025-01-01 10:01:03 - INFO - game_over() - Player wins!
+"""
+
+
+def test_games_are_read_from_logs_and_move_lists(tmp_path):
+    log = tmp_path / "game.log"
+    log.write_text(LOG)
+    games = tmp_path / "games.txt"
+    games.write_text("4444\n\n1234\n")
+    assert list(read_games([str(log), str(games)])) == ["414", "45", "4444", "1234"]
+
+
+def test_review(tmp_path, fake_solver):
+    games = tmp_path / "games.txt"
+    games.write_text("4455\n4456\n4432\n1234\n")  # shared prefixes, and mirror images of 44
+    out = str(tmp_path / "reviews.bin")
+    reviewer = review_games([str(games)], out, workers=2, batch_size=3, executable=fake_solver)
+    assert reviewer.games == 4
+    assert reviewer.analyzed < reviewer.positions
+
+    reviews = list(read_reviews(out))
+    assert [game for game, _, _ in reviews] == ["4455", "4456", "4432", "1234"]
+    game, best, played = reviews[2]
+    assert best == [0, 1, 2, 0]
+    assert played == [0, 1, 1, -2]
@@ -0,0 +1,28 @@
+from connect4_engine.core.board import Board
+from connect4_engine.tools.selfplay import read_results, simulate
+
+
+def test_games_are_played_to_the_end_and_recorded(tmp_path):
+    out = str(tmp_path / "selfplay.bin")
+    totals = simulate("random", "greedy", games=30, out=out, workers=2, chunk=7, seed=1)
+    assert totals["games"] == 30
+    assert totals["player_wins"] + totals["ai_wins"] + totals["draws"] == 30
+    # greedy takes its wins and blocks, random doesn't
+    assert totals["ai_wins"] > totals["player_wins"]
+
+    results = list(read_results(out))
+    assert len(results) == 30
+    for i, (moves, first, winner) in enumerate(results):
+        assert first == (Board.P_RED if i % 2 else Board.P_YELLOW)
+        board = Board()
+        for move in moves:
+            board.play(int(move) - 1)
+        assert board.done
+        # the color to move at the end is the one that didn't play last
+        last = first if len(moves) % 2 else Board.P_RED + Board.P_YELLOW - first
+        assert winner == (last if board.winner is not None else None)
+
+    # the same seed plays the same games, however they are split between workers
+    again = str(tmp_path / "again.bin")
+    simulate("random", "greedy", games=30, out=again, workers=3, chunk=4, seed=1)
+    assert list(read_results(again)) == results
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from connect4_engine.core.board import Board
+from connect4_engine.core.solver_async import AsyncSolverClient
+
+# answers in order; "sleep" lines take 0.3s and "crash" exits
+FAKE_SOLVER = """
+import sys, time
+for line in sys.stdin:
+    line = line.strip()
+    if line.startswith("sleep"):
+        time.sleep(0.3)
+    elif line == "crash":
+        sys.exit(1)
+    print(len(line) % 7, flush=True)
+"""
+
+
+def test_pipelined_answers_match_their_queries(fake_solver):
+    async def run():
+        async with AsyncSolverClient(fake_solver, pipeline_depth=2) as solver:
+            answers = await asyncio.gather(*(solver.query("4" * n) for n in range(1, 6)))
+            b = Board()
+            b.drop_piece(3, Board.P_RED, quiet=True)
+            col = await solver.choose_move(b)
+            return answers, col, solver.stats()
+
+    answers, col, stats = asyncio.run(run())
+    assert answers == ["1", "2", "3", "4", "5"]
+    assert col == 1
+    assert stats["answered"] == 6
+
+
+def test_cancelled_queries_are_skipped(fake_solver):
+    async def run():
+        async with AsyncSolverClient(fake_solver, pipeline_depth=2) as solver:
+            slow = asyncio.ensure_future(solver.query("sleep"))
+            superseded = asyncio.ensure_future(solver.query("xx"))
+            await asyncio.sleep(0.05)
+            superseded.cancel()  # already sent, its answer is discarded
+            with pytest.raises(Exception):
+                await solver.query("sleepy", timeout=0.1)  # never sent, the pipeline is full
+            assert await slow == "5"
+            assert await solver.query("123") == "3"
+            return solver.stats()
+
+    stats = asyncio.run(run())
+    assert stats["dropped"] == 1
+    assert stats["discarded"] == 1
+
+
+def test_interrupt_and_crash_restart_the_solver(fake_solver):
+    async def run():
+        async with AsyncSolverClient(fake_solver) as solver:
+            slow = asyncio.ensure_future(solver.query("sleep"))
+            await asyncio.sleep(0.05)
+            await solver.interrupt()
+            with pytest.raises(Exception):
+                await slow
+            with pytest.raises(Exception):
+                await solver.query("crash")
+            assert await solver.query("12") == "2"
+            return solver.stats()
+
+    assert asyncio.run(run())["restarts"] == 2
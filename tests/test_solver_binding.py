@@ -0,0 +1,31 @@
+import pytest
+
+from connect4_engine.core.board import Board
+from connect4_engine.core.solver_binding import INVALID_MOVE, load_binding
+
+binding = load_binding(book=None)
+pytestmark = pytest.mark.skipif(binding is None, reason="libc4solver not built")
+
+
+def test_solve_and_analyze():
+    # late position, fast to solve without the opening book
+    moves = "726121347245152162"
+    scores = binding.analyze(moves)
+    assert len(scores) == 7
+    assert binding.solve(moves) == max(s for s in scores if s != INVALID_MOVE)
+    assert binding.last_nodes > 0
+
+
+def test_full_column_and_invalid_position():
+    # columns 4, 5 and 7 are full
+    scores = binding.analyze("475774457522754657214321516462")
+    assert [s == INVALID_MOVE for s in scores] == [False, False, False, True, True, False, True]
+    with pytest.raises(Exception):
+        binding.solve("4757744575227546572143215164624")
+
+
+def test_choose_move_takes_the_win():
+    b = Board()
+    for move in "121212":
+        b.play(int(move) - 1)
+    assert binding.choose_move(b) == 0
@@ -0,0 +1,76 @@
+import pytest
+
+from connect4_engine.core.board import Board
+from connect4_engine.core import solver_pool
+from connect4_engine.core.solver_pool import DEFAULT_TIMEOUT, SolverError, SolverPool, SolverTimeout
+
+FAKE_SOLVER = """
+import sys, time
+for line in sys.stdin:
+    line = line.strip()
+    if line == "hang":
+        time.sleep(60)
+    elif line == "crash":
+        sys.exit(1)
+    else:
+        print(len(line) % 7, flush=True)
+"""
+
+# c4solver built before it answered invalid positions
+OLD_SOLVER = """
+import sys
+for line in sys.stdin:
+    if line.strip().isdigit() and "0" not in line:
+        print(len(line.strip()) % 7, flush=True)
+"""
+
+
+def test_queries_are_answered(fake_solver):
+    pool = SolverPool(fake_solver, size=2)
+    try:
+        b = Board()
+        b.drop_piece(3, Board.P_RED, quiet=True)
+        assert pool.choose_move(b) == 1
+        assert pool.query("4455") == "4"
+        assert pool.stats()["queries"] == 2
+    finally:
+        pool.close()
+
+
+def test_hung_solver_is_restarted(fake_solver):
+    pool = SolverPool(fake_solver, size=1, timeout=0.5)
+    try:
+        with pytest.raises(SolverTimeout):
+            pool.query("hang")
+        assert pool.query("44") == "2"
+        stats = pool.stats()
+        assert stats["timeouts"] == 1
+        assert stats["restarts"] == 1
+    finally:
+        pool.close()
+
+
+def test_crashed_solver_is_respawned(fake_solver):
+    pool = SolverPool(fake_solver, size=1, timeout=5)
+    try:
+        assert pool.query("1") == "1"
+        with pytest.raises(Exception):
+            pool.query("crash")  # crashes again on the retry
+        assert pool.query("123") == "3"
+        assert pool.stats()["crashes"] == 2
+    finally:
+        pool.close()
+
+
+def test_queries_time_out_by_default(fake_solver):
+    pool = SolverPool(fake_solver, size=1)
+    try:
+        assert pool.timeout == DEFAULT_TIMEOUT
+    finally:
+        pool.close()
+
+
+def test_solver_older_than_the_protocol_fails_fast(make_solver, monkeypatch):
+    monkeypatch.setattr(solver_pool, "PROBE_TIMEOUT", 0.5)
+    with pytest.raises(SolverError, match="rebuild"):
+        SolverPool(make_solver(OLD_SOLVER), size=1)
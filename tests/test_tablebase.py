@@ -0,0 +1,65 @@
+import pytest
+
+from connect4_engine.core.ai import AIPascalPons
+from connect4_engine.core.board import Board
+from connect4_engine.core.solver_binding import INVALID_MOVE
+from connect4_engine.core.tablebase import (Tablebase, build_tablebase, load_tablebase, mirror_key,
+                                            save_tablebase, solve_endgame)
+
+# 12 empty cells, c4solver -a scores it [-6, -6, -6, INVALID, INVALID, -6, INVALID]
+LATE = "475774457522754657214321516462"
+
+
+class NoSolver:
+    def analyze(self, board, timeout=None):
+        raise AssertionError("the solver should not be asked")
+
+
+def _play(moves: str) -> Board:
+    board = Board()
+    for move in moves:
+        board.play(int(move) - 1)
+    return board
+
+
+def test_mirror_key():
+    board, mirrored = _play("1123"), _play("7765")
+    assert mirror_key(board.key(), board.geometry) == mirrored.key()
+    assert mirror_key(mirror_key(board.key(), board.geometry), board.geometry) == board.key()
+
+
+def test_endgame_scores_match_the_solver():
+    scores = {}
+    assert solve_endgame(_play(LATE), scores) == -6
+    assert solve_endgame(_play(LATE[:-1]), scores) == 7  # c4solver agrees
+
+
+def test_lookups(tmp_path):
+    path = str(tmp_path / "test.tablebase")
+    save_tablebase(path, build_tablebase([LATE], 11), 11)
+    table = Tablebase(path)
+    assert table.max_empty == 11
+    assert table.analyze(_play(LATE)) == [-6, -6, -6, INVALID_MOVE, INVALID_MOVE, -6, INVALID_MOVE]
+    assert table.get(_play(LATE + "1")) == 6
+    assert table.get(_play(LATE)) is None  # 12 empty cells, only its replies are stored
+    assert table.analyze(_play("44")) is None  # out of reach, not counted
+    assert table.analyze(_play(LATE[:-2] + "33")) is None
+    assert (table.hits, table.misses) == (1, 1)
+    table.close()
+
+
+def test_invalid_files(tmp_path):
+    path = tmp_path / "bad.tablebase"
+    path.write_bytes(b"nope" + bytes(20))
+    with pytest.raises(Exception):
+        Tablebase(str(path))
+    assert load_tablebase(str(path)) is None
+    assert load_tablebase(str(tmp_path / "missing.tablebase")) is None
+
+
+def test_ai_answers_from_the_tablebase(tmp_path):
+    path = str(tmp_path / "test.tablebase")
+    save_tablebase(path, build_tablebase([LATE], 11), 11)
+    ai = AIPascalPons(pool=NoSolver(), tablebase=Tablebase(path))
+    assert ai.choose_move(_play(LATE)) == 0
+    assert ai.last_tier == "tablebase"
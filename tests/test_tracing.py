@@ -0,0 +1,63 @@
+import json
+
+from connect4_engine import game as game_module
+from connect4_engine.game import Connect4Game
+from connect4_engine.hardware.mock import ArduinoSim, RobotSim
+from connect4_engine.utils.tracing import Histogram, Tracer
+
+
+def test_histogram_percentiles_are_within_the_bucket_precision():
+    h = Histogram()
+    for value in range(1, 100_001):
+        h.record(value)
+    assert h.count == 100_000
+    assert h.min == 1 and h.max == 100_000
+    for q in (50, 90, 99, 99.9):
+        exact = q / 100 * 100_000
+        assert abs(h.percentile(q) - exact) / exact < 1 / 32
+    # every value is counted in exactly one bucket, below its upper bound
+    assert sum(h.counts.values()) == h.count
+    assert all(Histogram.bucket(Histogram.bucket_upper(b)) == b for b in h.counts)
+    assert h.count_at_most(200_000) == h.count
+
+
+def test_spans_are_exported(tmp_path):
+    tracer = Tracer()
+    for _ in range(3):
+        with tracer.span("stage"):
+            pass
+    tracer.record("arm", 1.5)
+
+    prom = tmp_path / "turns.prom"
+    snapshot = tmp_path / "turns.json"
+    tracer.export(str(prom), str(snapshot))
+    text = prom.read_text()
+    assert 'connect4_stage_seconds_bucket{stage="arm",le="1"} 0' in text
+    assert 'connect4_stage_seconds_bucket{stage="arm",le="2.5"} 1' in text
+    assert 'connect4_stage_seconds_count{stage="stage"} 3' in text
+    stages = json.loads(snapshot.read_text())["stages"]
+    assert stages["stage"]["count"] == 3
+    assert abs(stages["arm"]["p50"] - 1.5) < 1.5 / 32
+
+    tracer.enabled = False
+    with tracer.span("stage"):
+        pass
+    assert tracer.histograms["stage"].count == 3
+
+
+class FirstColumnAI:
+    def choose_move(self, board):
+        return board.available_actions()[0]
+
+
+def test_turn_stages_are_traced():
+    tracer = game_module.tracer
+    tracer.reset()
+    game = Connect4Game(ArduinoSim(), RobotSim(), ai=FirstColumnAI())
+    game.game_start()
+    game.arduino.drop(3)
+    stages = tracer.snapshot()["stages"]
+    assert stages["game.ai_turn"]["count"] == 2
+    assert stages["game.player_move"]["count"] == 1
+    for stage in ("game.ai_solve", "game.ai_pickup", "game.place_puck", "game.give_player_puck"):
+        assert stage in stages